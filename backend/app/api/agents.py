@@ -9,8 +9,8 @@ from app.database import get_db
 from app.models import Agent, User
 from app.models.agent import AgentType, AuthType, VerificationLevel, AgentStatus
 from app.services.agent_caller import AgentCaller
-from app.services.vector_store import VectorStore
-from app.services.llm_gateway import LLMGateway
+from app.services.vector_store import VectorStore, get_vector_store, schema_fingerprint
+from app.services.llm_gateway import get_llm_gateway
 from app.api.auth import get_current_user
 
 router = APIRouter(prefix="/api/agents", tags=["agents"])
@@ -54,7 +54,8 @@ class AgentVerifyResponse(BaseModel):
 async def create_agent(
     agent_data: AgentCreate,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    vector_store: VectorStore = Depends(get_vector_store)
 ):
     """Create a new agent with A2A compliance"""
     
@@ -105,7 +106,6 @@ async def create_agent(
     await db.refresh(agent)
     
     # Index in vector store
-    vector_store = VectorStore()
     await vector_store.index_agent(
         str(agent.id),
         agent.name,
@@ -119,6 +119,10 @@ async def create_agent(
         }
     )
     
+    # Index both schemas so compatibility scoring can reuse their vectors
+    for schema in (agent.input_schema, agent.output_schema):
+        await vector_store.index_schema(schema_fingerprint(schema), schema, str(agent.id))
+    
     # Trigger async verification
     # TODO: Queue verification task
     
@@ -144,13 +148,13 @@ async def list_agents(
     limit: int = 50,
     search: Optional[str] = None,
     verification_level: Optional[str] = None,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    vector_store: VectorStore = Depends(get_vector_store)
 ):
     """List agents with optional search and filters"""
     
     if search:
         # Use vector search
-        vector_store = VectorStore()
         search_results = await vector_store.search_agents(
             search,
             top_k=limit,
@@ -261,7 +265,7 @@ async def verify_agent(
     
     # Generate improvement recommendations if needed
     if agent.verification_level in [VerificationLevel.UNVERIFIED, VerificationLevel.L1]:
-        llm_gateway = LLMGateway()
+        llm_gateway = get_llm_gateway()
         fixes = await llm_gateway.generate_verification_fixes(
             verification_result["tests"],
             agent.output_schema
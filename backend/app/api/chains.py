@@ -14,8 +14,8 @@ from app.services.agent_caller import AgentCaller
 from app.services.wallet_service import WalletService
 from app.services.provenance_tracker import ProvenanceTracker
 from app.services.gat_service import GATService
-from app.services.llm_gateway import LLMGateway
-from app.services.vector_store import VectorStore
+from app.services.llm_gateway import get_llm_gateway
+from app.services.vector_store import VectorStore, get_vector_store, schema_fingerprint
 from app.api.auth import get_current_user
 
 router = APIRouter(prefix="/api/chains", tags=["chains"])
@@ -345,7 +345,8 @@ async def cancel_run(
 async def check_chain_compatibility(
     chain_id: str,
     current_user: User = Depends(get_current_user),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    vector_store: VectorStore = Depends(get_vector_store)
 ):
     """Check compatibility scores for all edges in a chain"""
     
@@ -369,7 +370,6 @@ async def check_chain_compatibility(
     agents = {str(a.id): a for a in result.scalars().all()}
     
     # Calculate compatibility for each edge
-    vector_store = VectorStore()
     compatibility_results = []
     
     for edge in chain.descriptor.get("edges", []):
@@ -385,7 +385,9 @@ async def check_chain_compatibility(
                 from_agent.output_schema,
                 to_agent.input_schema,
                 from_agent.sample_response,
-                to_agent.sample_request
+                to_agent.sample_request,
+                source_fp=schema_fingerprint(from_agent.output_schema),
+                target_fp=schema_fingerprint(to_agent.input_schema)
             )
             
             compatibility_results.append({
@@ -421,8 +423,8 @@ async def execute_chain_async(
         # Initialize services
         transform_pipeline = TransformPipeline(
             db,
-            GATService(db, VectorStore()),
-            LLMGateway()
+            GATService(db, get_vector_store()),
+            get_llm_gateway()
         )
         
         orchestrator = DAGOrchestrator(
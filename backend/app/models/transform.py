@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, Enum as SQLEnum, ForeignKey, JSON, Boolean, DateTime
+from sqlalchemy import Column, String, Integer, Enum as SQLEnum, ForeignKey, JSON, Boolean, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import enum
@@ -52,3 +52,13 @@ class MappingHint(BaseModel):
     
     # Relationships
     transform_records = relationship("TransformRecord", back_populates="mapping_hint")
+    
+    # Best hint for a schema pair is an index-only lookup
+    __table_args__ = (
+        Index(
+            "ix_mapping_hints_fp_pair_success",
+            source_schema_fp,
+            target_schema_fp,
+            success_count.desc()
+        ),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, BigInteger, Enum as SQLEnum, ForeignKey, Integer, JSON
+from sqlalchemy import Column, String, BigInteger, Enum as SQLEnum, ForeignKey, Integer, JSON, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import enum
@@ -35,7 +35,12 @@ class Transaction(BaseModel):
     type = Column(SQLEnum(TransactionType), nullable=False)
     amount_cents = Column(Integer, nullable=False)
     status = Column(SQLEnum(TransactionStatus), default=TransactionStatus.PENDING, nullable=False)
-    external_id = Column(String, unique=True, index=True)
+    external_id = Column(String)
     transaction_metadata = Column(JSON, default=dict)  # Additional transaction informations
     # Relationships
     wallet = relationship("Wallet", back_populates="transactions")
+    
+    __table_args__ = (
+        # Backs the ON CONFLICT (external_id) idempotency upsert
+        Index("ix_tx_external_id", "external_id", unique=True),
+    )
@@ -11,6 +11,7 @@ import re
 from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime
 import asyncio
+from collections import OrderedDict
 from jsonschema import validate, ValidationError
 import numpy as np
 
@@ -52,6 +53,9 @@ class AdvancedOrchestrator(OrchestratorMethods):
             'score': ['confidence', 'probability', 'certainty']
         }
         
+        # alias -> [(target_field, rank)], built lazily from field_aliases
+        self._alias_reverse_cache: Optional[Tuple[Dict, Dict]] = None
+        
         # Merge policies
         self.merge_policies = {
             'concat_text': self._merge_concat_text,
@@ -59,6 +63,16 @@ class AdvancedOrchestrator(OrchestratorMethods):
             'prefer_high_confidence': self._merge_prefer_high_confidence,
             'authoritative': self._merge_authoritative
         }
+        
+        # Schema fingerprints and validators keyed by id(schema), LRU-evicted;
+        # the schema is kept with its entry so a recycled id is never a cache hit
+        self.schema_cache_capacity = 256
+        self._fp_cache: OrderedDict[int, Tuple[Dict, str]] = OrderedDict()
+        self._validator_cache: OrderedDict[int, Tuple[Dict, Any]] = OrderedDict()
+        
+        # GAT suggestions per (source_fp, target_fp), LRU-evicted
+        self.gat_cache_capacity = 512
+        self._gat_cache: OrderedDict[Tuple[str, str], List[Dict]] = OrderedDict()
 
     def canonical_json(self, obj: dict) -> str:
         """Create canonical JSON for HMAC signing"""
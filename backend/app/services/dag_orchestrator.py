@@ -114,19 +114,16 @@ class DAGOrchestrator:
                     batch_tasks.append((node_id, task))
                 
                 # Wait for batch completion
+                settlements = []
                 for node_id, task in batch_tasks:
                     try:
                         result = await task
                         node_results[node_id] = result
                         completed_nodes.add(node_id)
                         
-                        # Settle payment for successful node
+                        # Queue payment for successful node
                         agent = await self._get_agent(dag_nodes[node_id].agent_id)
-                        await self.wallet_service.settle_node_payment(
-                            chain_run.id,
-                            node_id,
-                            agent.price_cents
-                        )
+                        settlements.append((node_id, agent.price_cents))
                         
                         # Add newly ready nodes to queue
                         for edge in dag_edges:
@@ -146,6 +143,10 @@ class DAGOrchestrator:
                             chain_run.id,
                             node_id
                         )
+                
+                # Settle the whole batch in one commit
+                if settlements:
+                    await self.wallet_service.settle_many(chain_run.id, settlements)
             
             # Merge final outputs
             final_output = await self._merge_outputs(
@@ -159,7 +160,10 @@ class DAGOrchestrator:
                 final_output,
                 node_results,
                 chain_run.id
-            )
+            ).to_dict()
+            
+            # Persist buffered transform records before totalling spend
+            await self.transform_pipeline.flush_records()
             
             # Update chain run
             chain_run.status = RunStatus.SUCCEEDED
@@ -187,6 +191,12 @@ class DAGOrchestrator:
             chain_run.status = RunStatus.FAILED
             chain_run.finished_at = datetime.utcnow()
             
+            # Keep the records of transforms that did succeed
+            try:
+                await self.transform_pipeline.flush_records()
+            except Exception as flush_error:
+                logger.error(f"Failed to flush transform records: {str(flush_error)}")
+            
             # Refund all reserved funds
             await self.wallet_service.refund_all(chain_run.id)
             
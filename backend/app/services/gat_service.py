@@ -6,7 +6,8 @@ import numpy as np
 from typing import List, Dict, Optional, Tuple
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-import json
+from datetime import datetime
+import orjson
 
 from app.models import Agent, ExecutionLog, MappingHint, GATModel
 from app.services.vector_store import VectorStore
@@ -22,7 +23,10 @@ class GraphAttentionNetwork(torch.nn.Module):
         self.conv2 = GATConv(hidden_dim * num_heads, hidden_dim, heads=num_heads, dropout=0.1)
         self.conv3 = GATConv(hidden_dim * num_heads, output_dim, heads=1, concat=False, dropout=0.1)
         
-        self.dropout = torch.nn.Dropout(0.2)
+        # In-place dropout reuses the ELU output buffer. ELU itself stays
+        # out-of-place: it saves its result for backward, so an in-place ELU
+        # followed by in-place dropout would corrupt the autograd graph.
+        self.dropout = torch.nn.Dropout(0.2, inplace=True)
 
     def forward(self, x, edge_index, return_attention=False):
         # First GAT layer
@@ -50,7 +54,9 @@ class GATService:
         self.vector_store = vector_store
         self.model = None
         self.node_embeddings = {}
+        self._emb_norm = None  # Row-normalized embeddings, indexed like agent_index_map
         self.agent_index_map = {}
+        self._attn: Dict[Tuple[int, int], Tuple[float, ...]] = {}  # (src, tgt) -> per-layer attention
         self.embedding_dim = 384
         
     async def initialize(self):
@@ -106,6 +112,15 @@ class GATService:
             if epoch % 20 == 0:
                 logger.info(f"GAT Training - Epoch {epoch}, Loss: {loss.item():.4f}")
         
+        # Final inference pass: capture embeddings and attention once so
+        # lookups never have to re-run the full network
+        self.model.eval()
+        with torch.no_grad():
+            embeddings, attention = self.model(
+                graph_data.x, graph_data.edge_index, return_attention=True
+            )
+        self._attn = self._build_attention_index(attention)
+        
         # Save model and embeddings
         await self._save_model(embeddings.detach())
         
@@ -161,35 +176,29 @@ class GATService:
         
         recommendations = []
         
-        # Get agent embedding
+        # Get agent row in the embedding matrix
         agent_idx = self.agent_index_map[agent_id]
-        agent_embedding = self.node_embeddings.get(agent_idx)
         
-        if agent_embedding is None:
+        if self._emb_norm is None or agent_idx >= self._emb_norm.size(0):
             return []
         
-        # Find similar agents using cosine similarity
-        similarities = []
-        for other_id, other_idx in self.agent_index_map.items():
-            if other_id == agent_id:
-                continue
-            
-            other_embedding = self.node_embeddings.get(other_idx)
-            if other_embedding is not None:
-                similarity = F.cosine_similarity(
-                    agent_embedding.unsqueeze(0),
-                    other_embedding.unsqueeze(0)
-                ).item()
-                
-                similarities.append({
-                    'agent_id': other_id,
-                    'similarity': similarity
-                })
+        # Embeddings are pre-normalized, so cosine similarity is a single mat-vec
+        scores = self._emb_norm @ self._emb_norm[agent_idx]
+        
+        # Exclude the agent itself, then select top-k while still in tensor land
+        scores[agent_idx] = float('-inf')
+        k = min(top_k, scores.size(0) - 1)
+        top_scores, top_indices = torch.topk(scores, k)
         
-        # Sort and get top-k
-        similarities.sort(key=lambda x: x['similarity'], reverse=True)
+        # Single transfer to Python for the small top-k slice
+        index_agent_map = {idx: other_id for other_id, idx in self.agent_index_map.items()}
+        similarities = [
+            {'agent_id': index_agent_map[idx], 'similarity': score}
+            for idx, score in zip(top_indices.cpu().tolist(), top_scores.cpu().tolist())
+            if idx in index_agent_map
+        ]
         
-        for item in similarities[:top_k]:
+        for item in similarities:
             # Get additional context
             agent_data = await self._get_agent_data(item['agent_id'])
             attention_trace = await self._get_attention_trace(agent_id, item['agent_id'])
@@ -227,16 +236,18 @@ class GATService:
         if len(agents) < 2:
             return None
         
+        # Agent embeddings in bounded encoder batches; cached agents skip the
+        # encoder, and the bulk pass never evicts entries used by searches
+        embeddings = await self.vector_store.encode_many(
+            [self._create_agent_text(agent) for agent in agents],
+            evict=False
+        )
+        
         # Create node features
         node_features = []
-        for i, agent in enumerate(agents):
+        for i, (agent, embedding) in enumerate(zip(agents, embeddings)):
             self.agent_index_map[str(agent.id)] = i
             
-            # Get agent embedding from vector store
-            embedding = await self.vector_store.get_embedding(
-                self._create_agent_text(agent)
-            )
-            
             # Add additional features
             features = embedding.tolist()
             features.extend([
@@ -249,10 +260,6 @@ class GATService:
             
             node_features.append(features)
         
-        # Create edges from co-execution history
-        edges = []
-        edge_weights = []
-        
         # Query execution logs for co-executions
         result = await self.db.execute(select(ExecutionLog))
         logs = result.scalars().all()
@@ -275,29 +282,35 @@ class GATService:
                         key = tuple(sorted([agent1, agent2]))
                         co_execution_counts[key] = co_execution_counts.get(key, 0) + 1
         
-        # Convert to edge list
-        for (agent1, agent2), count in co_execution_counts.items():
-            idx1 = self.agent_index_map[agent1]
-            idx2 = self.agent_index_map[agent2]
-            
-            edges.append([idx1, idx2])
-            edges.append([idx2, idx1])  # Bidirectional
-            
-            weight = min(count / 10.0, 1.0)  # Normalize weight
-            edge_weights.extend([weight, weight])
-        
-        if not edges:
+        # Convert to edge arrays (each undirected pair is stored once here)
+        if co_execution_counts:
+            pairs = np.array(
+                [
+                    (self.agent_index_map[agent1], self.agent_index_map[agent2])
+                    for agent1, agent2 in co_execution_counts
+                ],
+                dtype=np.int64
+            )
+            src, dst = pairs[:, 0], pairs[:, 1]
+            counts = np.fromiter(co_execution_counts.values(), dtype=np.float32)
+            weights = np.minimum(counts / 10.0, 1.0)  # Normalize weight
+        else:
             # Create minimal connectivity if no co-executions
-            for i in range(len(agents) - 1):
-                edges.append([i, i + 1])
-                edges.append([i + 1, i])
-                edge_weights.extend([0.1, 0.1])
+            src = np.arange(len(agents) - 1, dtype=np.int64)
+            dst = src + 1
+            weights = np.full(len(src), 0.1, dtype=np.float32)
+        
+        # Mirror both directions in a single vectorized build
+        row = np.concatenate([src, dst])
+        col = np.concatenate([dst, src])
+        values = np.concatenate([weights, weights])
         
         # Create PyTorch geometric data
         x = torch.tensor(node_features, dtype=torch.float)
-        edge_index = torch.tensor(edges, dtype=torch.long).t().contiguous()
+        edge_index = torch.from_numpy(np.stack([row, col]))
+        edge_weight = torch.from_numpy(values)
         
-        return Data(x=x, edge_index=edge_index)
+        return Data(x=x, edge_index=edge_index, edge_weight=edge_weight)
 
     async def _get_attention_between_agents(
         self,
@@ -315,21 +328,43 @@ class GATService:
         source_idx = self.agent_index_map[source_agent_id]
         target_idx = self.agent_index_map[target_agent_id]
         
-        # Get attention weights from model
-        # This is simplified - in production, would need to properly extract attention
-        weight = 0.7  # Placeholder
+        # Look up attention cached at the end of training
+        layer_weights = self._attn.get((source_idx, target_idx))
+        if layer_weights is None:
+            return {
+                'weight': 0.5,
+                'source_agent': source_agent_id,
+                'target_agent': target_agent_id,
+                'layers': []
+            }
         
         return {
-            'weight': weight,
+            'weight': sum(layer_weights) / len(layer_weights),
             'source_agent': source_agent_id,
             'target_agent': target_agent_id,
             'layers': [
-                {'layer': 1, 'weight': weight * 0.8},
-                {'layer': 2, 'weight': weight * 1.0},
-                {'layer': 3, 'weight': weight * 0.9}
+                {'layer': layer, 'weight': weight}
+                for layer, weight in enumerate(layer_weights, start=1)
             ]
         }
 
+    def _build_attention_index(self, attention) -> Dict[Tuple[int, int], Tuple[float, ...]]:
+        """Index per-edge attention (averaged over heads) for every GAT layer"""
+        
+        per_layer = []
+        for layer_edge_index, alpha in attention:
+            scores = alpha.mean(dim=1).tolist()
+            pairs = zip(layer_edge_index[0].tolist(), layer_edge_index[1].tolist())
+            per_layer.append(dict(zip(pairs, scores)))
+        
+        # GATConv aggregates messages from source (row 0) into target (row 1)
+        attn_index = {}
+        for edge in per_layer[0]:
+            if all(edge in layer for layer in per_layer):
+                attn_index[edge] = tuple(layer[edge] for layer in per_layer)
+        
+        return attn_index
+
     async def _generate_mapping_recipe(
         self,
         source_schema: dict,
@@ -460,9 +495,9 @@ class GATService:
         text_parts = [
             agent.name,
             agent.description or "",
-            json.dumps(agent.input_schema) if agent.input_schema else "",
-            json.dumps(agent.output_schema) if agent.output_schema else "",
-            json.dumps(agent.sample_response) if agent.sample_response else ""
+            orjson.dumps(agent.input_schema).decode() if agent.input_schema else "",
+            orjson.dumps(agent.output_schema).decode() if agent.output_schema else "",
+            orjson.dumps(agent.sample_response).decode() if agent.sample_response else ""
         ]
         
         return " ".join(text_parts)
@@ -590,7 +625,10 @@ class GATService:
         # Store embeddings
         for agent_id, idx in self.agent_index_map.items():
             self.node_embeddings[idx] = embeddings[idx]
-
+        
+        # Normalize once so similarity queries are plain dot products
+        self._emb_norm = F.normalize(embeddings, dim=1).contiguous()
+    
     async def _load_model(self, gat_model: GATModel):
         """Load existing model"""
         
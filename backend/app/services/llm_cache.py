@@ -0,0 +1,107 @@
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+import zstandard
+
+from app.core.logging import logger
+
+class PersistentLLMCache:
+    """SQLite-backed LLM response cache with zstd-compressed values, survives restarts"""
+
+    def __init__(self, path: str, ttl_seconds: int = 7 * 24 * 3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        
+        self._compressor = zstandard.ZstdCompressor(level=3)
+        self._decompressor = zstandard.ZstdDecompressor()
+        
+        # One connection and codec pair shared across worker threads,
+        # serialized by a lock (zstd contexts are not thread-safe)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                response BLOB NOT NULL,
+                created_at INTEGER NOT NULL,
+                tokens INTEGER
+            )"""
+        )
+        self._conn.commit()
+        
+        logger.info(f"Persistent LLM cache opened at {path}")
+
+    def get(self, key: str) -> Optional[str]:
+        """Get a cached response, or None if missing or expired"""
+        
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?",
+                (key,)
+            ).fetchone()
+            
+            if row is None:
+                return None
+            
+            response, created_at = row
+            if self.ttl_seconds and time.time() - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            
+            return self._decompressor.decompress(response).decode()
+
+    def set(self, key: str, response: str, tokens: Optional[int] = None):
+        """Store a response under its prompt key"""
+        
+        with self._lock:
+            compressed = self._compressor.compress(response.encode())
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at, tokens) VALUES (?, ?, ?, ?)",
+                (key, compressed, int(time.time()), tokens)
+            )
+            self._conn.commit()
+
+    def delete(self, key: str):
+        """Remove a single entry"""
+        
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        """Remove all entries"""
+        
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def close(self):
+        """Close the underlying connection"""
+        
+        with self._lock:
+            self._conn.close()
+
+# One cache per database path for the whole process
+_shared_caches: Dict[str, PersistentLLMCache] = {}
+_shared_caches_lock = threading.Lock()
+
+def get_persistent_cache(path: str, ttl_seconds: int = 7 * 24 * 3600) -> PersistentLLMCache:
+    """Shared PersistentLLMCache for a path, opened on first use"""
+    
+    with _shared_caches_lock:
+        cache = _shared_caches.get(path)
+        if cache is None:
+            cache = _shared_caches[path] = PersistentLLMCache(path, ttl_seconds=ttl_seconds)
+        return cache
+
+def close_persistent_caches():
+    """Close every shared cache connection (application shutdown)"""
+    
+    with _shared_caches_lock:
+        for cache in _shared_caches.values():
+            cache.close()
+        _shared_caches.clear()
@@ -1,11 +1,85 @@
 import os
-import json
 import re
-from typing import Dict, Optional, Any, List
+import asyncio
+import hashlib
+import threading
+import orjson
+from collections import OrderedDict
+from typing import Dict, Optional, Any, List, Set, Tuple
 from datetime import datetime
 import google.generativeai as genai
+from jsonschema.validators import validator_for
+from app.services.llm_cache import get_persistent_cache
 from app.core.logging import logger
 
+# PII patterns, combined into one alternation so redaction is a single pass.
+# Cards come before the shorter digit patterns so the longest match wins.
+_PII_RE = re.compile(
+    r'(?P<email>\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}\b)'
+    r'|(?P<card>\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b)'
+    r'|(?P<phone>\b\d{3}[-.]?\d{3}[-.]?\d{4}\b)'
+    r'|(?P<ssn>\b\d{3}-\d{2}-\d{4}\b)'
+)
+_PII_REPLACEMENTS = {
+    'email': '[EMAIL]',
+    'card': '[CARD]',
+    'phone': '[PHONE]',
+    'ssn': '[SSN]'
+}
+
+# Token estimation fallback when Gemini does not report usage
+_WORD_RE = re.compile(r'\S+')
+
+# JSON extraction patterns
+_MD_JSON_RE = re.compile(r'```json\s*')
+_MD_FENCE_RE = re.compile(r'```\s*')
+
+class _JSONObjectScanner:
+    """Incremental brace matcher: feed text in chunks, get back each completed top-level {...}"""
+    
+    def __init__(self):
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._partial = ""  # Text of an object still open at the end of the last chunk
+    
+    def feed(self, text: str) -> List[str]:
+        """Consume a chunk and return the objects it completes, respecting string literals"""
+        
+        completed = []
+        start = 0 if self._depth > 0 else -1
+        
+        for i, ch in enumerate(text):
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == '\\':
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                if self._depth > 0:
+                    self._in_string = True
+            elif ch == '{':
+                if self._depth == 0:
+                    start = i
+                self._depth += 1
+            elif ch == '}' and self._depth > 0:
+                self._depth -= 1
+                if self._depth == 0:
+                    completed.append(self._partial + text[start:i + 1])
+                    self._partial = ""
+        
+        if self._depth > 0:
+            self._partial += text[start:]
+        
+        return completed
+
+def _scan_json_objects(text: str) -> List[str]:
+    """Return top-level {...} slices of text found in a single pass"""
+    
+    return _JSONObjectScanner().feed(text)
+
 class LLMGateway:
     """Centralized LLM gateway with Gemini integration, budget control, and safety measures"""
     
@@ -28,11 +102,54 @@ class LLMGateway:
         # Budget tracking
         self.daily_token_limit = 100000
         self.daily_tokens_used = 0
-        self.last_reset = datetime.utcnow()
+        self._reset_day = datetime.utcnow().toordinal()  # UTC day the counter belongs to
+        self._budget_lock = asyncio.Lock()
         
         # Cost estimation (per 1000 tokens)
         self.input_token_cost = 0.00025  # $0.25 per million
         self.output_token_cost = 0.00125  # $1.25 per million
+        
+        # Exact-match response cache (LRU, keyed by prompt hash)
+        self.cache_capacity = 1024
+        self._cache: OrderedDict[str, str] = OrderedDict()
+        self._cache_lock = asyncio.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        
+        # Optional persistent second-level cache (disabled unless a path is set),
+        # one connection per process shared by every gateway
+        cache_path = os.getenv("LLM_CACHE_PATH")
+        self.persistent_cache = get_persistent_cache(
+            cache_path,
+            ttl_seconds=int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+        ) if cache_path else None
+        
+        # Micro-batcher: concurrent transform() calls share one Gemini call
+        self.batch_size = 8
+        self.batch_window_seconds = 0.02
+        self._batch_queue: Optional[asyncio.Queue] = None
+        self._batch_worker: Optional[asyncio.Task] = None
+        self._batch_tasks: Set[asyncio.Task] = set()
+        
+        # Tokens billed per run_id (LRU); a batched call is split between its
+        # runs by each task's share of the prompt
+        self.run_usage_capacity = 1024
+        self._run_tokens: OrderedDict[str, float] = OrderedDict()
+        
+        # Prompts at least this long are streamed so parsing overlaps the download
+        self.stream_min_prompt_chars = 4000
+        
+        # Bound concurrent Gemini requests to respect rate limits
+        self.max_concurrent_calls = 8
+        self._sem = asyncio.Semaphore(self.max_concurrent_calls)
+        
+        # Serialized schemas for prompt building, keyed by id() of the schema
+        # dict; the dict itself is kept alongside so a reused id never matches
+        self.schema_cache_capacity = 256
+        self._schema_text_cache: OrderedDict[int, Tuple[dict, str]] = OrderedDict()
+        
+        # Compiled JSON schema validators, keyed and bounded the same way
+        self._validator_cache: OrderedDict[int, Tuple[dict, Any]] = OrderedDict()
 
     async def transform(
         self,
@@ -43,6 +160,108 @@ class LLMGateway:
     ) -> Optional[dict]:
         """Transform data to match target schema using LLM"""
         
+        # Per-call examples need a prompt of their own
+        if examples:
+            return await self._transform_single(input_data, target_schema, str(run_id), examples)
+        
+        # Otherwise go through the micro-batcher so concurrent callers share Gemini calls
+        loop = asyncio.get_running_loop()
+        
+        if self._batch_queue is None or self._batch_worker is None or self._batch_worker.done():
+            self._batch_queue = asyncio.Queue()
+            self._batch_worker = loop.create_task(self._run_batch_worker())
+        
+        future = loop.create_future()
+        await self._batch_queue.put((input_data, target_schema, str(run_id), future))
+        return await future
+
+    async def _run_batch_worker(self):
+        """Collect queued transforms over a short window and dispatch them in batches"""
+        
+        queue = self._batch_queue
+        
+        while True:
+            pending = [await queue.get()]
+            await asyncio.sleep(self.batch_window_seconds)
+            
+            while len(pending) < self.batch_size and not queue.empty():
+                pending.append(queue.get_nowait())
+            
+            # Batches run concurrently, bounded by the call semaphore
+            task = asyncio.get_running_loop().create_task(self._dispatch_batch(pending))
+            self._batch_tasks.add(task)
+            task.add_done_callback(self._batch_tasks.discard)
+
+    async def _dispatch_batch(self, pending: List[Tuple[dict, dict, str, asyncio.Future]]):
+        """Transform one collected batch and resolve each caller's future"""
+        
+        try:
+            if len(pending) == 1:
+                input_data, target_schema, run_id, _ = pending[0]
+                results = [await self._transform_single(input_data, target_schema, run_id)]
+            else:
+                results = await self._transform_chunk(pending)
+            
+            for (_, _, _, future), result in zip(pending, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            # Never leave a caller waiting, also when the batch is cancelled
+            for _, _, _, future in pending:
+                if not future.done():
+                    future.cancel()
+
+    async def _transform_chunk(
+        self,
+        pending: List[Tuple[dict, dict, str, asyncio.Future]]
+    ) -> List[Optional[dict]]:
+        """Transform several requests with a single prompt, falling back per item on a malformed reply"""
+        
+        try:
+            if not await self._check_budget():
+                logger.warning("LLM daily token limit exceeded")
+                return [None] * len(pending)
+            
+            tasks = [
+                '{"input_json":' + orjson.dumps(input_data).decode()
+                + ',"target_schema":' + self._dumps_schema(target_schema) + '}'
+                for input_data, target_schema, _, _ in pending
+            ]
+            prompt = self._redact_pii(self._build_batch_transform_prompt(tasks))
+            response, tokens = await self._call_gemini_metered(prompt)
+            
+            # Each run pays for its own task's share of the call
+            total_chars = sum(len(task) for task in tasks)
+            for task, (_, _, run_id, _) in zip(tasks, pending):
+                self._bill_run(run_id, tokens * len(task) / total_chars)
+            
+            batch_result = self._extract_json(response) if response else None
+            
+            if isinstance(batch_result, list) and len(batch_result) == len(pending):
+                return [
+                    await self._accept_transform_result(result, target_schema)
+                    for result, (_, target_schema, _, _) in zip(batch_result, pending)
+                ]
+            
+            logger.warning("Batched LLM response did not match batch size, retrying individually")
+            
+        except Exception as e:
+            logger.error(f"LLM batch transform failed: {str(e)}")
+        
+        return await asyncio.gather(*(
+            self._transform_single(input_data, target_schema, run_id)
+            for input_data, target_schema, run_id, _ in pending
+        ))
+
+    async def _transform_single(
+        self,
+        input_data: dict,
+        target_schema: dict,
+        run_id: str,
+        examples: List[dict] = None
+    ) -> Optional[dict]:
+        """Transform one record with its own prompt"""
+        
         try:
             # Check budget
             if not await self._check_budget():
@@ -55,8 +274,11 @@ class LLMGateway:
             # Redact PII before sending
             prompt = self._redact_pii(prompt)
             
-            # Call Gemini
-            response = await self._call_gemini(prompt)
+            # Call Gemini, streaming large transforms
+            response, tokens = await self._call_gemini_metered(
+                prompt, stream=len(prompt) >= self.stream_min_prompt_chars
+            )
+            self._bill_run(run_id, tokens)
             
             if not response:
                 return None
@@ -64,24 +286,29 @@ class LLMGateway:
             # Extract JSON from response
             result = self._extract_json(response)
             
-            if not result:
-                return None
-            
-            # Validate against schema
-            if await self._validate_schema(result, target_schema):
-                return result
-            
-            # Try cleanup if validation fails
-            cleaned = await self._cleanup_json(result, target_schema)
-            if cleaned and await self._validate_schema(cleaned, target_schema):
-                return cleaned
-            
-            return None
+            return await self._accept_transform_result(result, target_schema)
             
         except Exception as e:
             logger.error(f"LLM transform failed: {str(e)}")
             return None
 
+    async def _accept_transform_result(self, result: Any, target_schema: dict) -> Optional[dict]:
+        """Validate a transform result, attempting cleanup before rejecting it"""
+        
+        if not result or not isinstance(result, dict):
+            return None
+        
+        # Validate against schema
+        if await self._validate_schema(result, target_schema):
+            return result
+        
+        # Try cleanup if validation fails
+        cleaned = await self._cleanup_json(result, target_schema)
+        if cleaned and await self._validate_schema(cleaned, target_schema):
+            return cleaned
+        
+        return None
+
     async def generate_mapping_suggestion(
         self,
         source_schema: dict,
@@ -135,8 +362,8 @@ class LLMGateway:
 Input: List of 3 sample agent responses and the declared output JSON Schema.
 Output: Up to 5 precise, actionable fixes the agent owner can implement to reach L2/L3 verification. Use bullet items, each one line maximum.
 
-Test Results: {json.dumps(test_results, indent=2)}
-Expected Schema: {json.dumps(output_schema, indent=2)}
+Test Results: {orjson.dumps(test_results).decode()}
+Expected Schema: {self._dumps_schema(output_schema)}
 
 Return bullet points only."""
         
@@ -153,6 +380,22 @@ Return bullet points only."""
         
         return []
 
+    def _dumps_schema(self, schema: dict) -> str:
+        """Serialize a schema for prompts, reusing the text for schemas seen before"""
+        
+        entry = self._schema_text_cache.get(id(schema))
+        if entry is not None and entry[0] is schema:
+            self._schema_text_cache.move_to_end(id(schema))
+            return entry[1]
+        
+        text = orjson.dumps(schema).decode()
+        self._schema_text_cache[id(schema)] = (schema, text)
+        self._schema_text_cache.move_to_end(id(schema))
+        if len(self._schema_text_cache) > self.schema_cache_capacity:
+            self._schema_text_cache.popitem(last=False)
+        
+        return text
+
     def _build_transform_prompt(
         self,
         input_data: dict,
@@ -165,13 +408,22 @@ Return bullet points only."""
 produce a single JSON object that exactly matches the schema. Only output the JSON object and nothing else. 
 If a field cannot be produced, set it to null."""
         
-        user_prompt = {
-            "input_json": input_data,
-            "target_schema": target_schema,
-            "examples": examples or []
-        }
+        user_prompt = (
+            '{"input_json":' + orjson.dumps(input_data).decode()
+            + ',"target_schema":' + self._dumps_schema(target_schema)
+            + ',"examples":' + orjson.dumps(examples or []).decode() + '}'
+        )
         
-        return f"{system_prompt}\n\nUser: {json.dumps(user_prompt, indent=2)}\n\nReturn only JSON:"
+        return f"{system_prompt}\n\nUser: {user_prompt}\n\nReturn only JSON:"
+
+    def _build_batch_transform_prompt(self, tasks: List[str]) -> str:
+        """Build a single prompt covering several serialized transform tasks"""
+        
+        system_prompt = """You are a JSON synthesizer. You are given a list of tasks, each with input_json and target_schema (JSON Schema). 
+For each task produce a single JSON object that exactly matches its schema. If a field cannot be produced, set it to null. 
+Return a JSON array where element i is the result for task i, and nothing else."""
+        
+        return f"{system_prompt}\n\nTasks: [{','.join(tasks)}]\n\nReturn only the JSON array:"
 
     def _build_mapping_prompt(
         self,
@@ -187,10 +439,10 @@ Input: source JSON schema and example, target JSON schema and example.
 Output: A JSON mapping recipe consisting only of atomic operations (rename, coerce, concat, default, truncate).
 Return JSON only.
 
-Source Schema: {json.dumps(source_schema, indent=2)}
-Source Example: {json.dumps(source_example, indent=2) if source_example else 'None'}
-Target Schema: {json.dumps(target_schema, indent=2)}
-Target Example: {json.dumps(target_example, indent=2) if target_example else 'None'}
+Source Schema: {self._dumps_schema(source_schema)}
+Source Example: {orjson.dumps(source_example).decode() if source_example else 'None'}
+Target Schema: {self._dumps_schema(target_schema)}
+Target Example: {orjson.dumps(target_example).decode() if target_example else 'None'}
 
 Return a JSON recipe array only:"""
 
@@ -206,90 +458,258 @@ Return a JSON recipe array only:"""
 create a final merged JSON that conforms to the schema. Also output a provenance_map mapping each field to origin and confidence. 
 Output JSON only.
 
-Branch Outputs: {json.dumps(branch_outputs, indent=2)}
-Target Schema: {json.dumps(target_schema, indent=2)}
-Provenance Data: {json.dumps(provenance_data, indent=2) if provenance_data else 'None'}
+Branch Outputs: {orjson.dumps(branch_outputs).decode()}
+Target Schema: {self._dumps_schema(target_schema)}
+Provenance Data: {orjson.dumps(provenance_data).decode() if provenance_data else 'None'}
 
 Return only the merged JSON:"""
 
-    async def _call_gemini(self, prompt: str) -> Optional[str]:
-        """Call Gemini API with rate limiting and error handling"""
+    def _bill_run(self, run_id: str, tokens: float):
+        """Add tokens to a run's usage, evicting the least recently billed run"""
+        
+        if not tokens:
+            return
+        self._run_tokens[run_id] = self._run_tokens.get(run_id, 0.0) + tokens
+        self._run_tokens.move_to_end(run_id)
+        if len(self._run_tokens) > self.run_usage_capacity:
+            self._run_tokens.popitem(last=False)
+
+    def run_tokens_used(self, run_id: str) -> float:
+        """Tokens billed to a run by this gateway"""
         
-        try:
-            # Estimate tokens (rough approximation)
-            estimated_tokens = len(prompt.split()) * 1.3
-            
-            # Check budget
+        return self._run_tokens.get(str(run_id), 0.0)
+
+    async def close(self):
+        """Stop the transform batcher, cancelling batches still in flight"""
+        
+        tasks = [self._batch_worker, *self._batch_tasks] if self._batch_worker else list(self._batch_tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        
+        # Requests still queued were never picked up by the worker
+        if self._batch_queue is not None:
+            while not self._batch_queue.empty():
+                _, _, _, future = self._batch_queue.get_nowait()
+                if not future.done():
+                    future.cancel()
+        
+        self._batch_queue = None
+        self._batch_worker = None
+
+    def clear_cache(self):
+        """Drop all cached responses and reset cache statistics"""
+        
+        self._cache.clear()
+        if self.persistent_cache:
+            self.persistent_cache.clear()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Get response cache statistics"""
+        
+        return {
+            "size": len(self._cache),
+            "capacity": self.cache_capacity,
+            "hits": self.cache_hits,
+            "misses": self.cache_misses
+        }
+
+    async def _call_gemini(self, prompt: str, stream: bool = False) -> Optional[str]:
+        """Call Gemini API with rate limiting and error handling
+        
+        With stream=True the response is read chunk by chunk and returned as soon
+        as the first complete JSON object has arrived.
+        """
+        
+        text, _ = await self._call_gemini_metered(prompt, stream)
+        return text
+
+    async def _call_gemini_metered(self, prompt: str, stream: bool = False) -> Tuple[Optional[str], float]:
+        """_call_gemini that also returns the tokens billed for the call (0 when cached)"""
+        
+        # Serve repeated prompts from the response cache
+        key = hashlib.sha256(prompt.encode()).hexdigest()
+        async with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                self.cache_hits += 1
+                return cached, 0.0
+            self.cache_misses += 1
+        
+        # Fall through to the persistent cache before paying for an API call
+        if self.persistent_cache:
+            cached = await asyncio.to_thread(self.persistent_cache.get, key)
+            if cached is not None:
+                await self._cache_response(key, cached)
+                return cached, 0.0
+        
+        # Reserve the estimated tokens up front so concurrent calls cannot
+        # all pass the budget check and overshoot the limit together
+        estimated_tokens = self._estimate_tokens(prompt)
+        async with self._budget_lock:
+            self._reset_budget_if_new_day()
             if self.daily_tokens_used + estimated_tokens > self.daily_token_limit:
                 logger.warning("Would exceed daily token limit")
-                return None
-            
-            # Generate response
-            response = self.model.generate_content(prompt)
-            
-            # Track usage
+                return None, 0.0
             self.daily_tokens_used += estimated_tokens
-            
-            return response.text
-            
+        
+        try:
+            # Generate response off the event loop
+            async with self._sem:
+                if stream:
+                    text, response = await self._generate_streaming(prompt)
+                else:
+                    response = await asyncio.to_thread(self.model.generate_content, prompt)
+                    text = response.text
         except Exception as e:
+            async with self._budget_lock:
+                self.daily_tokens_used -= estimated_tokens
             logger.error(f"Gemini API call failed: {str(e)}")
-            return None
+            return None, 0.0
+        
+        # Track usage: replace the reservation with the reported token count
+        actual_tokens = self._usage_tokens(response, estimated_tokens)
+        async with self._budget_lock:
+            self.daily_tokens_used += actual_tokens - estimated_tokens
+        
+        await self._cache_response(key, text)
+        if self.persistent_cache:
+            await asyncio.to_thread(self.persistent_cache.set, key, text, int(actual_tokens))
+        
+        return text, actual_tokens
 
-    def _extract_json(self, text: str) -> Optional[dict]:
-        """Extract JSON from LLM response"""
+    async def _generate_streaming(self, prompt: str) -> Tuple[str, Optional[Any]]:
+        """Stream a response, stopping early once a complete JSON object has been parsed
+        
+        Returns the text and, when the stream ran to completion, the response
+        object (for usage metadata); None if the stream was cut short.
+        """
         
-        # Try to find JSON block
-        json_pattern = r'\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\}'
-        matches = re.findall(json_pattern, text)
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        done = object()
         
-        for match in matches:
+        def produce():
             try:
-                return json.loads(match)
-            except json.JSONDecodeError:
-                continue
+                response = self.model.generate_content(prompt, stream=True)
+                for chunk in response:
+                    if stop.is_set():
+                        return
+                    loop.call_soon_threadsafe(queue.put_nowait, chunk.text)
+                loop.call_soon_threadsafe(queue.put_nowait, (done, response))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+        
+        loop.run_in_executor(None, produce)
+        
+        parts = []
+        scanner = _JSONObjectScanner()
+        try:
+            while True:
+                item = await queue.get()
+                
+                if isinstance(item, Exception):
+                    raise item
+                if isinstance(item, tuple) and item[0] is done:
+                    return "".join(parts), item[1]
+                
+                parts.append(item)
+                for candidate in scanner.feed(item):
+                    try:
+                        orjson.loads(candidate)
+                    except orjson.JSONDecodeError:
+                        continue
+                    # Complete object received; drop the rest of the stream
+                    return candidate, None
+        finally:
+            stop.set()
+
+    async def _cache_response(self, key: str, text: str):
+        """Insert a response into the in-memory LRU, evicting the oldest entry"""
+        
+        async with self._cache_lock:
+            self._cache[key] = text
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.cache_capacity:
+                self._cache.popitem(last=False)
+
+    def _estimate_tokens(self, prompt: str) -> float:
+        """Estimate prompt tokens (rough approximation)"""
+        
+        return sum(1 for _ in _WORD_RE.finditer(prompt)) * 1.3
+
+    def _usage_tokens(self, response: Any, fallback: float) -> float:
+        """Get total tokens billed for a response, falling back to the estimate"""
+        
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return fallback
+        
+        prompt_tokens = getattr(usage, "prompt_token_count", None)
+        output_tokens = getattr(usage, "candidates_token_count", None)
+        if prompt_tokens is None and output_tokens is None:
+            return fallback
+        
+        return (prompt_tokens or 0) + (output_tokens or 0)
+
+    def _extract_json(self, text: str) -> Optional[dict]:
+        """Extract JSON from LLM response"""
         
         # Try parsing entire response as JSON
         try:
-            return json.loads(text)
-        except json.JSONDecodeError:
+            return orjson.loads(text.strip())
+        except orjson.JSONDecodeError:
             pass
         
         # Try removing markdown code blocks
-        text = re.sub(r'```json\s*', '', text)
-        text = re.sub(r'```\s*', '', text)
+        text = _MD_JSON_RE.sub('', text)
+        text = _MD_FENCE_RE.sub('', text)
         
         try:
-            return json.loads(text.strip())
-        except json.JSONDecodeError:
-            return None
+            return orjson.loads(text.strip())
+        except orjson.JSONDecodeError:
+            pass
+        
+        # Scan for embedded JSON objects
+        for candidate in _scan_json_objects(text):
+            try:
+                return orjson.loads(candidate)
+            except orjson.JSONDecodeError:
+                continue
+        
+        return None
 
     def _redact_pii(self, text: str) -> str:
         """Redact PII from text"""
         
-        # Email addresses
-        text = re.sub(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b', '[EMAIL]', text)
-        
-        # Phone numbers
-        text = re.sub(r'\b\d{3}[-.]?\d{3}[-.]?\d{4}\b', '[PHONE]', text)
-        
-        # SSN
-        text = re.sub(r'\b\d{3}-\d{2}-\d{4}\b', '[SSN]', text)
-        
-        # Credit card numbers
-        text = re.sub(r'\b\d{4}[\s-]?\d{4}[\s-]?\d{4}[\s-]?\d{4}\b', '[CARD]', text)
-        
-        return text
+        return _PII_RE.sub(lambda m: _PII_REPLACEMENTS[m.lastgroup], text)
 
     async def _validate_schema(self, data: dict, schema: dict) -> bool:
         """Validate data against JSON schema"""
         
-        try:
-            import jsonschema
-            jsonschema.validate(instance=data, schema=schema)
-            return True
-        except jsonschema.ValidationError:
-            return False
+        return self._get_validator(schema).is_valid(data)
+
+    def _get_validator(self, schema: dict):
+        """Get a compiled validator for a schema, building it once per schema object"""
+        
+        entry = self._validator_cache.get(id(schema))
+        if entry is not None and entry[0] is schema:
+            self._validator_cache.move_to_end(id(schema))
+            return entry[1]
+        
+        validator_cls = validator_for(schema)
+        validator_cls.check_schema(schema)
+        validator = validator_cls(schema)
+        self._validator_cache[id(schema)] = (schema, validator)
+        self._validator_cache.move_to_end(id(schema))
+        if len(self._validator_cache) > self.schema_cache_capacity:
+            self._validator_cache.popitem(last=False)
+        
+        return validator
 
     async def _cleanup_json(self, data: dict, schema: dict) -> Optional[dict]:
         """Attempt to cleanup invalid JSON"""
@@ -333,13 +753,17 @@ Return only the merged JSON:"""
     async def _check_budget(self) -> bool:
         """Check if within budget limits"""
         
-        # Reset daily counter if needed
-        now = datetime.utcnow()
-        if (now - self.last_reset).days >= 1:
-            self.daily_tokens_used = 0
-            self.last_reset = now
+        async with self._budget_lock:
+            self._reset_budget_if_new_day()
+            return self.daily_tokens_used < self.daily_token_limit
+
+    def _reset_budget_if_new_day(self):
+        """Reset the daily counter at the UTC day boundary (call with _budget_lock held)"""
         
-        return self.daily_tokens_used < self.daily_token_limit
+        today = datetime.utcnow().toordinal()
+        if today != self._reset_day:
+            self.daily_tokens_used = 0
+            self._reset_day = today
 
     def estimate_cost(self, input_tokens: int, output_tokens: int) -> int:
         """Estimate cost in cents"""
@@ -348,3 +772,19 @@ Return only the merged JSON:"""
         output_cost = (output_tokens / 1000) * self.output_token_cost * 100
         
         return int(input_cost + output_cost)
+
+_llm_gateway: Optional[LLMGateway] = None
+
+def get_llm_gateway() -> LLMGateway:
+    """Process-wide LLMGateway, so concurrent runs share the batcher, caches and budget"""
+    
+    global _llm_gateway
+    if _llm_gateway is None:
+        _llm_gateway = LLMGateway()
+    return _llm_gateway
+
+async def close_llm_gateway():
+    """Stop the shared gateway's batcher, if the gateway was ever created"""
+    
+    if _llm_gateway is not None:
+        await _llm_gateway.close()
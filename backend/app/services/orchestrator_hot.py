@@ -0,0 +1,153 @@
+"""
+Hot-path helpers for OrchestratorMethods
+Type checks, schema scoring and mapping as module-level functions, kept out of
+the mixin so the per-field loops avoid attribute lookups on self
+"""
+
+from typing import Any, Callable, Dict, List, Tuple
+import orjson
+from jsonschema.exceptions import best_match
+
+# JSON schema type -> Python types accepted for it
+_TYPE_CHECKS: Dict[str, Any] = {
+    'string': str,
+    'number': (int, float),
+    'integer': int,
+    'boolean': bool,
+    'array': list,
+    'object': dict
+}
+
+_TRUE_STRINGS = frozenset(('true', '1', 'yes'))
+
+# JSON schema type -> coercion callable
+_COERCERS: Dict[str, Callable[[Any], Any]] = {
+    'string': str,
+    'integer': int,
+    'number': float,
+    'boolean': lambda v: v.lower() in _TRUE_STRINGS if isinstance(v, str) else bool(v),
+    'array': lambda v: v if isinstance(v, list) else [v],
+    'object': lambda v: orjson.loads(v) if isinstance(v, str) else dict(v)
+}
+
+def check_type_match(value: Any, expected_type: Any) -> bool:
+    """Check if value matches expected JSON schema type"""
+    
+    expected = _TYPE_CHECKS.get(expected_type)
+    return expected is None or isinstance(value, expected)
+
+def coerce_type(value: Any, target_type: Any) -> Any:
+    """Coerce value to target type"""
+    
+    coerce = _COERCERS.get(target_type)
+    if coerce is None:
+        return value
+    
+    try:
+        return coerce(value)
+    except Exception:
+        return value
+
+def compute_compatibility_score(
+    data: Dict[str, Any],
+    schema: Dict[str, Any],
+    validator: Any
+) -> Tuple[float, bool, List[str]]:
+    """
+    Compute compatibility score between data and schema
+    
+    Returns:
+        (score, is_valid, errors)
+    """
+    errors: List[str] = []
+    score: float = 0.0
+    
+    # Check required fields (weight 0.6)
+    required_fields: List[str] = schema.get('required', [])
+    properties: Dict[str, Any] = schema.get('properties', {})
+    
+    required_score: float = 1.0
+    if required_fields:
+        missing = [f for f in required_fields if f not in data]
+        if missing:
+            errors.append(f"Missing required fields: {missing}")
+            required_score = (len(required_fields) - len(missing)) / len(required_fields)
+    
+    score += required_score * 0.6
+    
+    # Check type compatibility (weight 0.2)
+    type_score: float = 1.0
+    type_matches: int = 0
+    type_total: int = 0
+    
+    for field, spec in properties.items():
+        if field in data:
+            type_total += 1
+            expected_type = spec.get('type')
+            
+            if check_type_match(data[field], expected_type):
+                type_matches += 1
+            else:
+                errors.append(f"Type mismatch for {field}: expected {expected_type}")
+    
+    if type_total > 0:
+        type_score = type_matches / type_total
+    
+    score += type_score * 0.2
+    
+    # Schema validation (weight 0.2)
+    validation_error = best_match(validator.iter_errors(data))
+    if validation_error is None:
+        score += 0.2
+        is_valid = True
+    else:
+        errors.append(str(validation_error))
+        is_valid = False
+    
+    return score, is_valid and len(errors) == 0, errors
+
+def apply_mapping(data: Dict[str, Any], mapping: Dict[str, Any]) -> Dict[str, Any]:
+    """Apply a mapping rule to transform data"""
+    
+    result: Dict[str, Any]
+    
+    if mapping['type'] == 'rename':
+        # Rename fields, building the output once straight from the input
+        renames: Dict[str, str] = mapping['mapping']
+        result = {}
+        for source, target in renames.items():
+            if source in data:
+                result[target] = data[source]
+            elif target in data:
+                result[target] = data[target]
+        
+        # Keep unmapped fields
+        for key, value in data.items():
+            if key not in renames and key not in result:
+                result[key] = value
+        
+        return result
+    
+    result = data.copy()
+    
+    if mapping['type'] == 'coerce':
+        # Type coercion
+        for field, target_type in mapping['fields'].items():
+            if field in result:
+                result[field] = coerce_type(result[field], target_type)
+    
+    elif mapping['type'] == 'extract':
+        # Extract from nested
+        for source_path, target in mapping['mapping'].items():
+            value: Any = result
+            
+            for part in source_path.split('.'):
+                if isinstance(value, dict):
+                    value = value.get(part)
+                else:
+                    break
+            
+            if value is not None:
+                result[target] = value
+    
+    return result
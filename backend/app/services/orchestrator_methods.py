@@ -3,12 +3,30 @@ Additional methods for AdvancedOrchestrator
 Split for file size management
 """
 
+from collections import deque
+from functools import lru_cache
 from typing import Dict, List, Any, Tuple
-import json
-import hashlib
-from jsonschema import validate, ValidationError
+import re
+import orjson
+import xxhash
+from jsonschema.validators import validator_for
+from app.services.orchestrator_hot import (
+    apply_mapping,
+    check_type_match,
+    coerce_type,
+    compute_compatibility_score
+)
 from app.core.logging import logger
 
+# Sentence boundary: whitespace following terminal punctuation
+_SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+
+@lru_cache(maxsize=4096)
+def _is_text_key(key: str) -> bool:
+    """Whether a field holds free text merged by the concat_text policy"""
+    lowered = key.lower()
+    return 'text' in lowered or 'summary' in lowered
+
 class OrchestratorMethods:
     """Mixin class with orchestrator methods"""
     
@@ -23,70 +41,29 @@ class OrchestratorMethods:
         Returns:
             (score, is_valid, errors)
         """
-        errors = []
-        score = 0.0
-        
-        # Check required fields (weight 0.6)
-        required_fields = schema.get('required', [])
-        properties = schema.get('properties', {})
-        
-        required_score = 1.0
-        if required_fields:
-            missing = [f for f in required_fields if f not in data]
-            if missing:
-                errors.append(f"Missing required fields: {missing}")
-                required_score = (len(required_fields) - len(missing)) / len(required_fields)
-        
-        score += required_score * 0.6
-        
-        # Check type compatibility (weight 0.2)
-        type_score = 1.0
-        type_matches = 0
-        type_total = 0
-        
-        for field, spec in properties.items():
-            if field in data:
-                type_total += 1
-                expected_type = spec.get('type')
-                actual_value = data[field]
-                
-                if self._check_type_match(actual_value, expected_type):
-                    type_matches += 1
-                else:
-                    errors.append(f"Type mismatch for {field}: expected {expected_type}")
-        
-        if type_total > 0:
-            type_score = type_matches / type_total
-        
-        score += type_score * 0.2
-        
-        # Schema validation (weight 0.2)
-        try:
-            validate(data, schema)
-            score += 0.2
-            is_valid = True
-        except ValidationError as e:
-            errors.append(str(e))
-            is_valid = False
-        
-        return score, is_valid and len(errors) == 0, errors
+        return compute_compatibility_score(data, schema, self._get_validator(schema))
+
+    def _get_validator(self, schema: Dict):
+        """Get a compiled validator for a schema, building it once per schema object"""
+        
+        entry = self._validator_cache.get(id(schema))
+        if entry is not None and entry[0] is schema:
+            self._validator_cache.move_to_end(id(schema))
+            return entry[1]
+        
+        validator_cls = validator_for(schema)
+        validator_cls.check_schema(schema)
+        validator = validator_cls(schema)
+        self._validator_cache[id(schema)] = (schema, validator)
+        self._validator_cache.move_to_end(id(schema))
+        if len(self._validator_cache) > self.schema_cache_capacity:
+            self._validator_cache.popitem(last=False)
+        
+        return validator
 
     def _check_type_match(self, value: Any, expected_type: str) -> bool:
         """Check if value matches expected JSON schema type"""
-        type_map = {
-            'string': str,
-            'number': (int, float),
-            'integer': int,
-            'boolean': bool,
-            'array': list,
-            'object': dict
-        }
-        
-        expected = type_map.get(expected_type)
-        if expected:
-            return isinstance(value, expected)
-        
-        return True
+        return check_type_match(value, expected_type)
 
     async def _try_deterministic_mappings(
         self,
@@ -126,19 +103,24 @@ class OrchestratorMethods:
         required = schema.get('required', [])
         
         # Strategy 1: Direct field matching with aliases
+        # Resolve aliases present in data with one set intersection; for each
+        # target keep the alias listed first, as a per-target scan would
+        best_alias = {}
+        alias_index = self._alias_reverse_map()
+        for alias in data.keys() & alias_index.keys():
+            for target_field, rank in alias_index[alias]:
+                if target_field in data:
+                    continue
+                if target_field not in best_alias or rank < best_alias[target_field][0]:
+                    best_alias[target_field] = (rank, alias)
+        
         mapping = {}
         for target_field in properties:
             # Check if field exists directly
             if target_field in data:
                 mapping[target_field] = target_field
-                continue
-            
-            # Check aliases
-            if hasattr(self, 'field_aliases') and target_field in self.field_aliases:
-                for alias in self.field_aliases[target_field]:
-                    if alias in data:
-                        mapping[alias] = target_field
-                        break
+            elif target_field in best_alias:
+                mapping[best_alias[target_field][1]] = target_field
         
         if mapping:
             mappings.append({'type': 'rename', 'mapping': mapping})
@@ -169,76 +151,33 @@ class OrchestratorMethods:
         
         return mappings
 
-    def _apply_mapping(self, data: Dict, mapping: Dict) -> Dict:
-        """Apply a mapping rule to transform data"""
+    def _alias_reverse_map(self) -> Dict[str, List[Tuple[str, int]]]:
+        """Map each alias to the (target_field, rank) pairs it can stand in for"""
         
-        result = data.copy()
+        aliases = getattr(self, 'field_aliases', None)
+        if not aliases:
+            return {}
         
-        if mapping['type'] == 'rename':
-            # Rename fields
-            new_data = {}
-            for source, target in mapping['mapping'].items():
-                if source in result:
-                    new_data[target] = result[source]
-                elif target in result:
-                    new_data[target] = result[target]
-            
-            # Keep unmapped fields
-            for key, value in result.items():
-                if key not in mapping['mapping'] and key not in new_data:
-                    new_data[key] = value
-            
-            result = new_data
-        
-        elif mapping['type'] == 'coerce':
-            # Type coercion
-            for field, target_type in mapping['fields'].items():
-                if field in result:
-                    result[field] = self._coerce_type(result[field], target_type)
-        
-        elif mapping['type'] == 'extract':
-            # Extract from nested
-            for source_path, target in mapping['mapping'].items():
-                parts = source_path.split('.')
-                value = result
-                
-                for part in parts:
-                    if isinstance(value, dict):
-                        value = value.get(part)
-                    else:
-                        break
-                
-                if value is not None:
-                    result[target] = value
+        # Rebuilt only when field_aliases is replaced with a new dict
+        cached = self._alias_reverse_cache
+        if cached is not None and cached[0] is aliases:
+            return cached[1]
         
-        return result
+        reverse: Dict[str, List[Tuple[str, int]]] = {}
+        for target_field, target_aliases in aliases.items():
+            for rank, alias in enumerate(target_aliases):
+                reverse.setdefault(alias, []).append((target_field, rank))
+        
+        self._alias_reverse_cache = (aliases, reverse)
+        return reverse
+
+    def _apply_mapping(self, data: Dict, mapping: Dict) -> Dict:
+        """Apply a mapping rule to transform data"""
+        return apply_mapping(data, mapping)
 
     def _coerce_type(self, value: Any, target_type: str) -> Any:
         """Coerce value to target type"""
-        
-        try:
-            if target_type == 'string':
-                return str(value)
-            elif target_type == 'integer':
-                return int(value)
-            elif target_type == 'number':
-                return float(value)
-            elif target_type == 'boolean':
-                if isinstance(value, str):
-                    return value.lower() in ['true', '1', 'yes']
-                return bool(value)
-            elif target_type == 'array':
-                if not isinstance(value, list):
-                    return [value]
-                return value
-            elif target_type == 'object':
-                if isinstance(value, str):
-                    return json.loads(value)
-                return dict(value)
-        except:
-            pass
-        
-        return value
+        return coerce_type(value, target_type)
 
     async def _try_gat_mappings(
         self,
@@ -248,21 +187,26 @@ class OrchestratorMethods:
     ) -> Dict:
         """Try GAT-suggested mappings"""
         
-        # Get fingerprints
-        source_fp = hashlib.md5(
-            json.dumps(sorted(data.keys())).encode()
-        ).hexdigest()
-        
-        target_fp = hashlib.md5(
-            json.dumps(schema, sort_keys=True).encode()
-        ).hexdigest()
-        
-        # Get GAT suggestions
-        suggestions = await self.gat_service.suggest_mappings(
-            source_fp,
-            target_fp,
-            data
-        )
+        # Get fingerprints (source is keys-only, so no JSON encoding needed)
+        source_fp = xxhash.xxh3_64_hexdigest(",".join(sorted(data.keys())).encode())
+        target_fp = self._schema_fingerprint(schema)
+        
+        # Get GAT suggestions (they depend only on the fingerprints); empty
+        # results are not cached, since an untrained model returns [] too
+        cache_key = (source_fp, target_fp)
+        suggestions = self._gat_cache.get(cache_key)
+        if suggestions is None:
+            suggestions = await self.gat_service.suggest_mappings(
+                source_fp,
+                target_fp,
+                data
+            )
+            if suggestions:
+                self._gat_cache[cache_key] = suggestions
+                if len(self._gat_cache) > self.gat_cache_capacity:
+                    self._gat_cache.popitem(last=False)
+        else:
+            self._gat_cache.move_to_end(cache_key)
         
         best_result = {'success': False, 'score': 0}
         
@@ -306,6 +250,23 @@ class OrchestratorMethods:
         
         return best_result
 
+    def _schema_fingerprint(self, schema: Dict) -> str:
+        """Fingerprint a schema, computing it once per schema object"""
+        
+        entry = self._fp_cache.get(id(schema))
+        if entry is not None and entry[0] is schema:
+            self._fp_cache.move_to_end(id(schema))
+            return entry[1]
+        
+        canonical = orjson.dumps(schema, option=orjson.OPT_SORT_KEYS)
+        fingerprint = xxhash.xxh3_64_hexdigest(canonical)
+        self._fp_cache[id(schema)] = (schema, fingerprint)
+        self._fp_cache.move_to_end(id(schema))
+        if len(self._fp_cache) > self.schema_cache_capacity:
+            self._fp_cache.popitem(last=False)
+        
+        return fingerprint
+
     async def _try_llm_synthesis(
         self,
         node: Dict,
@@ -332,15 +293,16 @@ REPLY: Only the JSON object, nothing else."""
         
         for attempt in range(max_retries):
             try:
+                user_prompt_json = orjson.dumps(user_prompt)
                 response = await self.llm_gateway.generate_transform(
                     system_prompt,
-                    json.dumps(user_prompt),
+                    user_prompt_json.decode(),
                     temperature=0.0
                 )
                 
                 # Parse response
                 if isinstance(response, str):
-                    transformed = json.loads(response)
+                    transformed = orjson.loads(response)
                 else:
                     transformed = response
                 
@@ -355,7 +317,7 @@ REPLY: Only the JSON object, nothing else."""
                         'success': True,
                         'score': score,
                         'transformed': transformed,
-                        'tokens_used': len(json.dumps(user_prompt)) // 4  # Rough estimate
+                        'tokens_used': len(user_prompt_json) // 4  # Rough estimate
                     }
                 
                 # If validation failed, add error to prompt for retry
@@ -377,24 +339,27 @@ REPLY: Only the JSON object, nothing else."""
         for parent in parents:
             # Collect text fields
             for key, value in parent.items():
-                if 'text' in key.lower() or 'summary' in key.lower():
+                if _is_text_key(key):
                     if isinstance(value, str):
                         text_parts.append(value)
                 elif key not in result:
                     result[key] = value
         
-        # Deduplicate sentences
+        # Deduplicate sentences by 64-bit digest rather than by full string
         sentences = []
         seen = set()
         
         for text in text_parts:
-            for sentence in text.split('.'):
+            for sentence in _SENTENCE_SPLIT_RE.split(text):
                 sentence = sentence.strip()
-                if sentence and sentence not in seen:
+                if not sentence:
+                    continue
+                digest = xxhash.xxh3_64_intdigest(sentence)
+                if digest not in seen:
                     sentences.append(sentence)
-                    seen.add(sentence)
+                    seen.add(digest)
         
-        result['text'] = '. '.join(sentences)
+        result['text'] = ' '.join(sentences)
         return result
 
     def _merge_json_by_key(self, parents: List[Dict]) -> Dict:
@@ -402,37 +367,58 @@ REPLY: Only the JSON object, nothing else."""
         
         result = {}
         
-        for parent in parents:
-            for key, value in parent.items():
-                if key not in result or result[key] is None:
-                    result[key] = value
-                elif isinstance(value, list) and isinstance(result[key], list):
+        # Nested dicts and lists are copied once, the first time something is
+        # merged into them, and then updated in place; ids of those copies are
+        # kept so parent outputs are never mutated
+        owned = {id(result)}
+        
+        # Explicit work queue of (destination, source) pairs instead of recursion
+        pending = deque((result, parent) for parent in parents)
+        
+        while pending:
+            target, source = pending.popleft()
+            
+            for key, value in source.items():
+                current = target.get(key)
+                
+                if current is None:
+                    target[key] = value
+                elif isinstance(value, list) and isinstance(current, list):
                     # Append lists
-                    result[key].extend(value)
-                elif isinstance(value, dict) and isinstance(result[key], dict):
-                    # Merge dicts recursively
-                    result[key] = self._merge_json_by_key([result[key], value])
+                    if id(current) not in owned:
+                        current = current + value
+                        target[key] = current
+                        owned.add(id(current))
+                    else:
+                        current.extend(value)
+                elif isinstance(value, dict) and isinstance(current, dict):
+                    # Merge nested dicts
+                    if id(current) not in owned:
+                        current = dict(current)
+                        target[key] = current
+                        owned.add(id(current))
+                    pending.append((current, value))
         
         return result
 
     def _merge_prefer_high_confidence(self, parents: List[Dict]) -> Dict:
         """Prefer fields from parent with higher confidence"""
         
-        # If parents have _confidence metadata
-        parents_with_conf = [
-            (p, p.get('_confidence', 0.5)) 
-            for p in parents
-        ]
+        def confidence(index: int) -> float:
+            return parents[index].get('_confidence', 0.5)
         
-        # Sort by confidence
-        parents_with_conf.sort(key=lambda x: x[1], reverse=True)
+        # Start with highest confidence (first one wins ties)
+        best_idx = max(range(len(parents)), key=confidence)
+        result = parents[best_idx].copy()
         
-        # Start with highest confidence
-        result = parents_with_conf[0][0].copy()
+        # Fill missing from others, still in confidence order; only the
+        # remaining parents need ordering, and with one left there is nothing to sort
+        others = [i for i in range(len(parents)) if i != best_idx]
+        if len(others) > 1:
+            others.sort(key=confidence, reverse=True)
         
-        # Fill missing from others
-        for parent, _ in parents_with_conf[1:]:
-            for key, value in parent.items():
+        for i in others:
+            for key, value in parents[i].items():
                 if key not in result:
                     result[key] = value
         
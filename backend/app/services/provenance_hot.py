@@ -0,0 +1,169 @@
+"""
+Hot-path helpers for ProvenanceTracker
+Field/value similarity and origin tracing as module-level functions,
+kept out of the tracker class so the per-field loops avoid attribute
+lookups on self
+"""
+
+from functools import lru_cache
+from operator import itemgetter
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+# Common field aliases, as (name, alias) pairs in both directions
+_FIELD_ALIASES: Dict[str, Tuple[str, ...]] = {
+    'text': ('content', 'body', 'message'),
+    'id': ('_id', 'identifier', 'key'),
+    'name': ('title', 'label'),
+    'description': ('desc', 'summary', 'abstract')
+}
+
+_ALIAS_PAIRS: FrozenSet[Tuple[str, str]] = frozenset(
+    pair
+    for key, values in _FIELD_ALIASES.items()
+    for value in values
+    for pair in ((key, value), (value, key))
+)
+
+# Value similarity: strings longer than this skip the substring check
+_MAX_SUBSTRING_CHARS = 4096
+_NUMERIC_TYPES: FrozenSet[type] = frozenset((int, float, bool))
+
+ExactIndex = Dict[Tuple[str, Any], str]
+# Name index entries are (scan position, node_id, field, value)
+NameIndex = Dict[str, List[Tuple[int, str, str, Any]]]
+
+@lru_cache(maxsize=4096)
+def _fields_similar(field1_lower: str, field2_lower: str) -> bool:
+    """Similarity of two lowercased field names, called with a canonical order"""
+    
+    # Exact match
+    if field1_lower == field2_lower:
+        return True
+    
+    # Common aliases
+    if (field1_lower, field2_lower) in _ALIAS_PAIRS:
+        return True
+    
+    # Substring match
+    return field1_lower in field2_lower or field2_lower in field1_lower
+
+StringMemo = Dict[Tuple[str, str], bool]
+
+def _strings_similar(value1: str, value2: str) -> bool:
+    """Substring or case-insensitive match of two unequal strings, called with a canonical order"""
+    
+    # Substring check, skipped for very long values
+    if len(value1) < _MAX_SUBSTRING_CHARS and len(value2) < _MAX_SUBSTRING_CHARS:
+        if value1 in value2 or value2 in value1:
+            return True
+    
+    # Case insensitive match
+    return value1.lower() == value2.lower()
+
+def are_fields_similar(field1: str, field2: str) -> bool:
+    """Check if two field names are similar"""
+    
+    field1_lower = field1.lower()
+    field2_lower = field2.lower()
+    
+    # Symmetric predicate, so (a, b) and (b, a) share one cache slot
+    if field1_lower <= field2_lower:
+        return _fields_similar(field1_lower, field2_lower)
+    return _fields_similar(field2_lower, field1_lower)
+
+def are_values_similar(value1: Any, value2: Any, memo: Optional[StringMemo] = None) -> bool:
+    """Check if two values are similar, memoizing string pairs in memo when given"""
+    
+    t1 = type(value1)
+    t2 = type(value2)
+    
+    # String similarity
+    if t1 is str and t2 is str:
+        if value1 == value2:
+            return True
+        
+        # Symmetric predicate, so (a, b) and (b, a) share one memo slot
+        key = (value1, value2) if value1 <= value2 else (value2, value1)
+        if memo is None:
+            return _strings_similar(*key)
+        similar = memo.get(key)
+        if similar is None:
+            similar = memo[key] = _strings_similar(*key)
+        return similar
+    
+    # Numeric similarity
+    if t1 in _NUMERIC_TYPES and t2 in _NUMERIC_TYPES:
+        return abs(value1 - value2) < 0.001
+    
+    return bool(value1 == value2)
+
+def build_origin_index(node_results: Dict[str, Any]) -> Tuple[ExactIndex, NameIndex]:
+    """Index node results by (field, value) and by lowercased field name"""
+    
+    exact_index: ExactIndex = {}
+    lower_name_index: NameIndex = {}
+    position = 0
+    
+    for node_id, result in node_results.items():
+        if not isinstance(result, dict):
+            continue
+        
+        for result_field, result_value in result.items():
+            try:
+                # First node in result order wins, as with a linear scan
+                exact_index.setdefault((result_field, result_value), node_id)
+            except TypeError:
+                # Unhashable values are matched through the name index
+                pass
+            
+            lower_name_index.setdefault(result_field.lower(), []).append(
+                (position, node_id, result_field, result_value)
+            )
+            position += 1
+    
+    return exact_index, lower_name_index
+
+def trace_field_origin(
+    field_name: str,
+    field_value: Any,
+    exact_index: ExactIndex,
+    lower_name_index: NameIndex,
+    memo: Optional[StringMemo] = None
+) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Trace the origin of a specific field
+    
+    Returns:
+        (node_id, None) for a direct match, (node_id, source_field) for a
+        transformed one, or (None, None) when no node matches
+    """
+    node_id: Optional[str]
+    
+    # Exact field and value match
+    try:
+        node_id = exact_index.get((field_name, field_value))
+    except TypeError:
+        node_id = None
+        for _, candidate_id, result_field, result_value in lower_name_index.get(field_name.lower(), []):
+            if result_field == field_name and result_value == field_value:
+                node_id = candidate_id
+                break
+    
+    if node_id is not None:
+        return node_id, None
+    
+    # Check for transformed fields, testing each distinct similar name
+    # rather than every field of every node; candidates are then tried in
+    # node and field order, so the first similar field in that order wins
+    field_lower = field_name.lower()
+    candidates: List[Tuple[int, str, str, Any]] = list(lower_name_index.get(field_lower, []))
+    for name, entries in lower_name_index.items():
+        if name != field_lower and are_fields_similar(field_name, name):
+            candidates.extend(entries)
+    candidates.sort(key=itemgetter(0))
+    
+    for _, candidate_id, result_field, result_value in candidates:
+        if are_values_similar(field_value, result_value, memo):
+            return candidate_id, result_field
+    
+    return None, None
@@ -1,138 +1,242 @@
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Tuple, Iterator
+from collections.abc import Mapping
 from datetime import datetime
 import hashlib
+import time
+import numpy as np
 
 from app.core.logging import logger
+from app.services.provenance_hot import (
+    are_fields_similar,
+    are_values_similar,
+    build_origin_index,
+    trace_field_origin
+)
+
+# Confidences are stored as uint8 steps of 1/200 (0.005)
+_CONFIDENCE_SCALE = 200
+
+def _quantize_confidences(confidences: List[float]) -> np.ndarray:
+    """Quantize confidences in [0, 1] to uint8"""
+    
+    values = np.clip(np.asarray(confidences, dtype=np.float32), 0.0, 1.0)
+    return np.rint(values * _CONFIDENCE_SCALE).astype(np.uint8)
+
+class WitnessDAG:
+    """Hash-consed DAG of transform-chain witnesses, identical chains share one root"""
+    
+    EPS = 0
+    
+    def __init__(self):
+        self._nodes: List[tuple] = [('eps',)]
+        self._index: Dict[tuple, int] = {('eps',): self.EPS}
+        self._expanded: Dict[int, List[str]] = {self.EPS: []}
+
+    def intern(self, node: tuple) -> int:
+        """Return the id of a node, adding it on first sight"""
+        
+        node_id = self._index.get(node)
+        if node_id is None:
+            node_id = len(self._nodes)
+            self._nodes.append(node)
+            self._index[node] = node_id
+        return node_id
+
+    def edge(self, label: str) -> int:
+        """Single-step chain"""
+        
+        return self.intern(('edge', label))
+
+    def concat(self, left: int, right: int) -> int:
+        """Chain of left followed by right"""
+        
+        if left == self.EPS:
+            return right
+        if right == self.EPS:
+            return left
+        return self.intern(('concat', left, right))
+
+    def chain(self, *labels: str) -> int:
+        """Chain of the given steps"""
+        
+        root = self.EPS
+        for label in labels:
+            root = self.concat(root, self.edge(label))
+        return root
+
+    def expand(self, root: int) -> List[str]:
+        """Materialize a chain, once per root (callers must not mutate the list)"""
+        
+        steps = self._expanded.get(root)
+        if steps is None:
+            node = self._nodes[root]
+            if node[0] == 'edge':
+                steps = [node[1]]
+            else:
+                steps = self.expand(node[1]) + self.expand(node[2])
+            self._expanded[root] = steps
+        return steps
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+class ProvenanceTable(Mapping):
+    """Per-field provenance of one run as parallel columns, read like a dict of dicts"""
+    
+    __slots__ = ('names', 'origins', 'methods', 'confidences', 'chains', 'timestamp', '_positions', '_witnesses')
+    
+    def __init__(
+        self,
+        names: List[str],
+        origins: List[str],
+        methods: List[str],
+        confidences: List[float],
+        chains: List[int],
+        timestamp: str,
+        witnesses: WitnessDAG
+    ):
+        self.names = names
+        self.origins = origins
+        self.methods = methods
+        self.confidences = _quantize_confidences(confidences)
+        self.chains = chains
+        self.timestamp = timestamp
+        self._positions = {name: i for i, name in enumerate(names)}
+        self._witnesses = witnesses
+
+    def __getitem__(self, field_name: str) -> dict:
+        """Materialize one field's provenance record"""
+        
+        i = self._positions[field_name]
+        return {
+            "origin": self.origins[i],
+            "method": self.methods[i],
+            "confidence": int(self.confidences[i]) / _CONFIDENCE_SCALE,
+            "transform_chain": self._witnesses.expand(self.chains[i]),
+            "timestamp": self.timestamp
+        }
+
+    def __contains__(self, field_name: object) -> bool:
+        return field_name in self._positions
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def to_dict(self) -> dict:
+        """Plain dict form, for JSON columns and API responses"""
+        
+        return {name: self[name] for name in self.names}
 
 class ProvenanceTracker:
     """Tracks per-field provenance for data transformations"""
     
     def __init__(self):
-        self.provenance_records = {}
+        # Field provenance tables by run_id
+        self.provenance_maps: Dict[str, ProvenanceTable] = {}
+        # Transform records sharded by run_id, then "{from_node}_{to_node}"
+        self.provenance_records: Dict[str, Dict[str, dict]] = {}
+        self.witnesses = WitnessDAG()
 
     def generate_provenance_map(
         self,
         final_output: dict,
         node_results: dict,
         run_id: str
-    ) -> dict:
+    ) -> ProvenanceTable:
         """Generate provenance map for final output"""
         
-        provenance_map = {}
+        names, origins, methods, confidences, chains = [], [], [], [], []
+        
+        # Index node results once for every output field; string comparisons
+        # are memoized for this map only, so payload text is not retained
+        index = self._build_origin_index(node_results)
+        memo: Dict[Tuple[str, str], bool] = {}
         
         for field_name, field_value in final_output.items():
             provenance = self._trace_field_origin(
                 field_name,
                 field_value,
-                node_results
+                node_results,
+                index,
+                memo
             )
             
-            provenance_map[field_name] = {
-                "origin": provenance.get("origin", "unknown"),
-                "method": provenance.get("method", "direct"),
-                "confidence": provenance.get("confidence", 0.5),
-                "transform_chain": provenance.get("transform_chain", []),
-                "timestamp": datetime.utcnow().isoformat()
-            }
+            names.append(field_name)
+            origins.append(provenance.get("origin", "unknown"))
+            methods.append(provenance.get("method", "direct"))
+            confidences.append(provenance.get("confidence", 0.5))
+            chains.append(provenance.get("chain", WitnessDAG.EPS))
+        
+        provenance_map = ProvenanceTable(
+            names, origins, methods, confidences, chains,
+            datetime.utcnow().isoformat(),
+            self.witnesses
+        )
         
         # Store for audit
-        self.provenance_records[run_id] = provenance_map
+        self.provenance_maps[run_id] = provenance_map
         
         return provenance_map
 
+    def _build_origin_index(
+        self,
+        node_results: dict
+    ) -> Tuple[Dict[Tuple[str, Any], str], Dict[str, List[Tuple[str, str, Any]]]]:
+        """Index node results by (field, value) and by lowercased field name"""
+        return build_origin_index(node_results)
+
     def _trace_field_origin(
         self,
         field_name: str,
         field_value: Any,
-        node_results: dict
+        node_results: dict,
+        index: Optional[tuple] = None,
+        memo: Optional[Dict[Tuple[str, str], bool]] = None
     ) -> dict:
         """Trace the origin of a specific field"""
         
-        # Check each node result for matching field
-        for node_id, result in node_results.items():
-            if isinstance(result, dict) and field_name in result:
-                if result[field_name] == field_value:
-                    return {
-                        "origin": node_id,
-                        "method": "direct",
-                        "confidence": 1.0,
-                        "transform_chain": [node_id]
-                    }
-        
-        # Check for transformed fields
-        for node_id, result in node_results.items():
-            if isinstance(result, dict):
-                # Check similar field names
-                for result_field, result_value in result.items():
-                    if self._are_fields_similar(field_name, result_field):
-                        if self._are_values_similar(field_value, result_value):
-                            return {
-                                "origin": node_id,
-                                "method": "transformed",
-                                "confidence": 0.8,
-                                "transform_chain": [node_id, f"rename_{result_field}_to_{field_name}"]
-                            }
-        
-        # Unknown origin
+        if index is None:
+            index = self._build_origin_index(node_results)
+        exact_index, lower_name_index = index
+        
+        node_id, source_field = trace_field_origin(
+            field_name, field_value, exact_index, lower_name_index, memo
+        )
+        
+        if node_id is None:
+            # Unknown origin
+            return {
+                "origin": "synthesized",
+                "method": "unknown",
+                "confidence": 0.3,
+                "chain": WitnessDAG.EPS
+            }
+        
+        if source_field is None:
+            return {
+                "origin": node_id,
+                "method": "direct",
+                "confidence": 1.0,
+                "chain": self.witnesses.chain(node_id)
+            }
+        
         return {
-            "origin": "synthesized",
-            "method": "unknown",
-            "confidence": 0.3,
-            "transform_chain": []
+            "origin": node_id,
+            "method": "transformed",
+            "confidence": 0.8,
+            "chain": self.witnesses.chain(node_id, f"rename_{source_field}_to_{field_name}")
         }
 
     def _are_fields_similar(self, field1: str, field2: str) -> bool:
         """Check if two field names are similar"""
-        
-        field1_lower = field1.lower()
-        field2_lower = field2.lower()
-        
-        # Exact match
-        if field1_lower == field2_lower:
-            return True
-        
-        # Common aliases
-        aliases = {
-            'text': ['content', 'body', 'message'],
-            'id': ['_id', 'identifier', 'key'],
-            'name': ['title', 'label'],
-            'description': ['desc', 'summary', 'abstract']
-        }
-        
-        for key, values in aliases.items():
-            if field1_lower == key and field2_lower in values:
-                return True
-            if field2_lower == key and field1_lower in values:
-                return True
-        
-        # Substring match
-        if field1_lower in field2_lower or field2_lower in field1_lower:
-            return True
-        
-        return False
+        return are_fields_similar(field1, field2)
 
     def _are_values_similar(self, value1: Any, value2: Any) -> bool:
         """Check if two values are similar"""
-        
-        if value1 == value2:
-            return True
-        
-        # String similarity
-        if isinstance(value1, str) and isinstance(value2, str):
-            # Substring check
-            if value1 in value2 or value2 in value1:
-                return True
-            
-            # Case insensitive match
-            if value1.lower() == value2.lower():
-                return True
-        
-        # Numeric similarity
-        if isinstance(value1, (int, float)) and isinstance(value2, (int, float)):
-            if abs(value1 - value2) < 0.001:
-                return True
-        
-        return False
+        return are_values_similar(value1, value2)
 
     def add_transform_provenance(
         self,
@@ -146,16 +250,17 @@ class ProvenanceTracker:
     ):
         """Add transformation provenance record"""
         
-        key = f"{run_id}_{from_node}_{to_node}"
+        key = f"{from_node}_{to_node}"
         
-        self.provenance_records[key] = {
+        self.provenance_records.setdefault(run_id, {})[key] = {
             "from_node": from_node,
             "to_node": to_node,
             "transform_method": transform_method,
             "input_fields": input_fields,
             "output_fields": output_fields,
             "confidence": confidence,
-            "timestamp": datetime.utcnow().isoformat()
+            # Nanoseconds since the epoch, formatted on export
+            "timestamp_ns": time.time_ns()
         }
 
     def get_field_lineage(
@@ -168,7 +273,7 @@ class ProvenanceTracker:
         lineage = []
         
         # Get provenance map for run
-        provenance_map = self.provenance_records.get(run_id, {})
+        provenance_map = self.provenance_maps.get(run_id, {})
         
         if field_name in provenance_map:
             field_provenance = provenance_map[field_name]
@@ -208,33 +313,41 @@ class ProvenanceTracker:
         
         return min(1.0, max(0.0, base))
 
+    def _format_transform_record(self, record: dict) -> dict:
+        """Transform record with its timestamp as an ISO string"""
+        
+        formatted = {k: v for k, v in record.items() if k != "timestamp_ns"}
+        formatted["timestamp"] = datetime.utcfromtimestamp(
+            record["timestamp_ns"] / 1e9
+        ).isoformat()
+        return formatted
+
     def export_provenance_report(self, run_id: str) -> dict:
         """Export complete provenance report for a run"""
         
         report = {
             "run_id": run_id,
             "generated_at": datetime.utcnow().isoformat(),
-            "field_provenance": self.provenance_records.get(run_id, {}),
-            "transform_records": [],
+            "field_provenance": {},
+            "transform_records": [
+                self._format_transform_record(record)
+                for record in self.provenance_records.get(run_id, {}).values()
+            ],
             "confidence_summary": {}
         }
         
-        # Calculate confidence summary
-        field_provenance = report["field_provenance"]
-        if field_provenance:
-            confidences = [p.get("confidence", 0) for p in field_provenance.values()]
+        # Calculate confidence summary on the quantized column
+        provenance_map = self.provenance_maps.get(run_id)
+        if provenance_map is not None and len(provenance_map):
+            report["field_provenance"] = provenance_map.to_dict()
             
+            confidences = provenance_map.confidences
             report["confidence_summary"] = {
-                "average": sum(confidences) / len(confidences) if confidences else 0,
-                "min": min(confidences) if confidences else 0,
-                "max": max(confidences) if confidences else 0,
-                "high_confidence_fields": sum(1 for c in confidences if c > 0.8),
-                "low_confidence_fields": sum(1 for c in confidences if c < 0.5)
+                "average": float(confidences.mean()) / _CONFIDENCE_SCALE,
+                "min": int(confidences.min()) / _CONFIDENCE_SCALE,
+                "max": int(confidences.max()) / _CONFIDENCE_SCALE,
+                "high_confidence_fields": int(np.count_nonzero(confidences > 0.8 * _CONFIDENCE_SCALE)),
+                "low_confidence_fields": int(np.count_nonzero(confidences < 0.5 * _CONFIDENCE_SCALE))
             }
         
-        # Add transform records
-        for key, value in self.provenance_records.items():
-            if key.startswith(f"{run_id}_"):
-                report["transform_records"].append(value)
-        
         return report
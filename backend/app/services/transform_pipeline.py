@@ -1,8 +1,10 @@
-import json
 import hashlib
-from typing import Dict, Optional, Any, List, Tuple
+import orjson
+from collections import OrderedDict
+from typing import Dict, Optional, Any, List, Tuple, Callable
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update, func
+from jsonschema.validators import validator_for
 
 from app.models import MappingHint, TransformRecord, ChainRun
 from app.models.transform import TransformMethod
@@ -10,6 +12,216 @@ from app.services.gat_service import GATService
 from app.services.llm_gateway import LLMGateway
 from app.core.logging import logger
 
+# Common renames: target field -> input field names that map onto it
+_RENAME_MAP = {
+    'text': ('document', 'body', 'content', 'message'),
+    'summary': ('abstract', 'description', 'overview'),
+    'title': ('name', 'heading', 'subject'),
+    'id': ('_id', 'identifier', 'key')
+}
+
+def _to_str(value: Any) -> Any:
+    return value if isinstance(value, str) else str(value)
+
+def _to_float(value: Any) -> Any:
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return value
+
+def _to_int(value: Any) -> Any:
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            pass
+    return value
+
+def _to_list(value: Any) -> Any:
+    return value if isinstance(value, list) else [value]
+
+def _to_bool(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.lower() in ('true', '1', 'yes')
+    return value
+
+# JSON schema type -> coercion callable
+_COERCERS = {
+    'string': _to_str,
+    'number': _to_float,
+    'integer': _to_int,
+    'array': _to_list,
+    'boolean': _to_bool
+}
+
+# Recipe operations, each compiled once into a closure that edits the result in place
+RecipeStep = Callable[[dict], None]
+
+def _rename_op(operation: dict) -> RecipeStep:
+    source, target = operation['from'], operation['to']
+    
+    def step(result: dict):
+        if source in result:
+            result[target] = result.pop(source)
+    
+    return step
+
+_RECIPE_COERCIONS = {'integer': int, 'float': float, 'string': str}
+
+def _coerce_op(operation: dict) -> RecipeStep:
+    field = operation['field']
+    coerce = _RECIPE_COERCIONS.get(operation['to'])
+    
+    def step(result: dict):
+        if coerce is not None and field in result:
+            result[field] = coerce(result[field])
+    
+    return step
+
+def _concat_op(operation: dict) -> RecipeStep:
+    fields, into = operation['fields'], operation['into']
+    separator = operation.get('separator', ' ')
+    
+    def step(result: dict):
+        values = [str(result.get(f, '')) for f in fields if f in result]
+        if values:
+            result[into] = separator.join(values)
+    
+    return step
+
+def _truncate_op(operation: dict) -> RecipeStep:
+    field = operation['field']
+    max_chars = operation.get('max_chars', 1000)
+    
+    def step(result: dict):
+        if field in result and isinstance(result[field], str):
+            result[field] = result[field][:max_chars]
+    
+    return step
+
+def _default_op(operation: dict) -> RecipeStep:
+    field = operation['field']
+    
+    def step(result: dict):
+        if field not in result or result[field] is None:
+            result[field] = operation['value']
+    
+    return step
+
+def _pick_op(operation: dict) -> RecipeStep:
+    fields = frozenset(operation.get('fields', []))
+    
+    def step(result: dict):
+        for key in [k for k in result if k not in fields]:
+            del result[key]
+    
+    return step
+
+_RECIPE_OPS: Dict[str, Callable[[dict], RecipeStep]] = {
+    'rename': _rename_op,
+    'coerce': _coerce_op,
+    'concat': _concat_op,
+    'truncate': _truncate_op,
+    'default': _default_op,
+    'pick': _pick_op
+}
+
+def _operation_fields(operation: dict) -> List[str]:
+    """Every field name an operation reads or writes"""
+    
+    # A coerce op's 'to' is a type name, not a field
+    keys = ('field',) if operation.get('op') == 'coerce' else ('from', 'to', 'field', 'into')
+    fields = list(operation.get('fields', []))
+    fields.extend(operation[key] for key in keys if key in operation)
+    return fields
+
+def _operation_key(operation: dict) -> tuple:
+    """Canonical (op, source, target) key of a recipe operation"""
+    
+    op_type = operation.get('op')
+    if op_type in ('concat', 'pick'):
+        source = tuple(operation.get('fields', []))
+    else:
+        source = operation.get('from', operation.get('field'))
+    target = operation.get('into') if op_type == 'concat' else operation.get('to')
+    return (op_type, source, target)
+
+def _advance_fields(fields: frozenset, key: tuple) -> Optional[frozenset]:
+    """Fields present after an operation, or None if it does not apply to them"""
+    
+    op_type, source, target = key
+    if op_type == 'rename':
+        return fields - {source} | {target} if source in fields else None
+    if op_type in ('coerce', 'truncate'):
+        return fields if source in fields else None
+    if op_type == 'concat':
+        return fields | {target} if fields.intersection(source) else None
+    if op_type == 'pick':
+        return fields.intersection(source)
+    if op_type == 'default':
+        return fields | {source}
+    return None
+
+class _RecipeTrie:
+    """Prefix trie over the operations of recipes that have succeeded before"""
+    
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.size = 0
+        self._root: Dict[Any, Any] = {}
+
+    def insert(self, recipe: List[dict]):
+        """Index a successful recipe by its operation sequence"""
+        
+        # Full tries stop growing, interior nodes included
+        if self.size >= self.capacity:
+            return
+        
+        node = self._root
+        for operation in recipe:
+            node = node.setdefault(_operation_key(operation), {})
+        
+        if None not in node:
+            node[None] = recipe
+            self.size += 1
+
+    def closest(self, fields, limit: int = 3) -> List[List[dict]]:
+        """Recipes along the deepest operation paths that apply to the given fields"""
+        
+        found: List[Tuple[int, List[dict]]] = []
+        stack = [(self._root, frozenset(fields), 0)]
+        while stack:
+            node, present, depth = stack.pop()
+            for key, child in node.items():
+                if key is None:
+                    found.append((depth, child))
+                    continue
+                after = _advance_fields(present, key)
+                if after is not None:
+                    stack.append((child, after, depth + 1))
+        
+        found.sort(key=lambda item: item[0], reverse=True)
+        return [recipe for _, recipe in found[:limit]]
+
+# One trie per target schema fingerprint (LRU), shared across pipelines so
+# recipes that produced a target from one source help with the next
+_RECIPE_TRIES_CAPACITY = 1024
+_RECIPE_TRIES: OrderedDict[str, _RecipeTrie] = OrderedDict()
+
+def _recipe_trie(target_fp: str, create: bool = False) -> Optional[_RecipeTrie]:
+    """Recipe trie for a target schema, created on demand"""
+    
+    trie = _RECIPE_TRIES.get(target_fp)
+    if trie is not None:
+        _RECIPE_TRIES.move_to_end(target_fp)
+    elif create:
+        trie = _RECIPE_TRIES[target_fp] = _RecipeTrie()
+        if len(_RECIPE_TRIES) > _RECIPE_TRIES_CAPACITY:
+            _RECIPE_TRIES.popitem(last=False)
+    return trie
+
 class TransformPipeline:
     """Handles data transformation between agents with deterministic -> GAT -> LLM fallback"""
     
@@ -22,6 +234,25 @@ class TransformPipeline:
         self.db = db
         self.gat_service = gat_service
         self.llm_gateway = llm_gateway
+        
+        # Schema fingerprints by schema object id (LRU)
+        self.fp_cache_capacity = 1024
+        self._fp_cache: OrderedDict[int, Tuple[dict, str]] = OrderedDict()
+        
+        # Transform records are buffered and written in batches
+        self.record_flush_size = 32
+        self._pending_records: List[TransformRecord] = []
+        self._uncommitted = False
+        
+        # Running spend per run_id, seeded from the database on first use
+        self._spent: Dict[str, int] = {}
+        
+        # Compiled validators by target schema fingerprint
+        self._validator_cache: Dict[str, Any] = {}
+        
+        # Compiled recipes by recipe object id (LRU)
+        self.recipe_cache_capacity = 512
+        self._recipe_cache: OrderedDict[int, Tuple[list, tuple]] = OrderedDict()
 
     async def transform(
         self,
@@ -57,12 +288,58 @@ class TransformPipeline:
                     TransformMethod.MAPPING_HINT, input_data, result,
                     recipe_id=mapping_hint.id
                 )
-                mapping_hint.success_count += 1
-                await self.db.commit()
+                await self.db.execute(
+                    update(MappingHint)
+                    .where(MappingHint.id == mapping_hint.id)
+                    .values(success_count=MappingHint.success_count + 1)
+                )
+                self._uncommitted = True
+                _recipe_trie(target_fp, create=True).insert(mapping_hint.recipe)
                 return result
             else:
-                mapping_hint.fail_count += 1
-                await self.db.commit()
+                await self.db.execute(
+                    update(MappingHint)
+                    .where(MappingHint.id == mapping_hint.id)
+                    .values(fail_count=MappingHint.fail_count + 1)
+                )
+                self._uncommitted = True
+        
+        validator = self._get_validator(target_schema)
+        
+        # 2b. Try the closest recipe that produced this target schema from
+        # other sources; applying learned mappings follows the GAT opt-in
+        trie = _recipe_trie(target_fp) if chain_run.auto_apply_gat else None
+        for recipe in (trie.closest(input_data.keys()) if trie else ()):
+            if mapping_hint is not None and recipe == mapping_hint.recipe:
+                continue
+            result = self._run_recipe(input_data, recipe)
+            if result and validator.is_valid(result):
+                # Cache it as its own hint for this schema pair, so it builds its
+                # own history and the hint that just failed keeps its record
+                hint = await self._find_mapping_hint(source_fp, target_fp, recipe)
+                if hint is None:
+                    hint = MappingHint(
+                        source_schema_fp=source_fp,
+                        target_schema_fp=target_fp,
+                        recipe=recipe,
+                        success_count=1
+                    )
+                    self.db.add(hint)
+                    await self.db.flush()
+                else:
+                    await self.db.execute(
+                        update(MappingHint)
+                        .where(MappingHint.id == hint.id)
+                        .values(success_count=MappingHint.success_count + 1)
+                    )
+                self._uncommitted = True
+                
+                await self._record_transform(
+                    chain_run.id, from_node, to_node,
+                    TransformMethod.MAPPING_HINT, input_data, result,
+                    recipe_id=hint.id
+                )
+                return result
         
         # 3. Try GAT suggestions if enabled
         if chain_run.auto_apply_gat and self.gat_service:
@@ -70,9 +347,11 @@ class TransformPipeline:
                 source_fp, target_fp, input_data
             )
             
+            # Recipes and validation are CPU-only, so test suggestions
+            # inline and stop at the first one that validates
             for suggestion in gat_suggestions:
-                result = await self._apply_recipe(input_data, suggestion['recipe'])
-                if result and await self._validate_output(result, target_schema):
+                result = self._run_recipe(input_data, suggestion['recipe'])
+                if result and validator.is_valid(result):
                     # Cache successful GAT suggestion
                     new_hint = MappingHint(
                         source_schema_fp=source_fp,
@@ -83,6 +362,7 @@ class TransformPipeline:
                     )
                     self.db.add(new_hint)
                     await self.db.commit()
+                    _recipe_trie(target_fp, create=True).insert(suggestion['recipe'])
                     
                     await self._record_transform(
                         chain_run.id, from_node, to_node,
@@ -113,6 +393,11 @@ class TransformPipeline:
         result = {}
         target_props = target_schema.get('properties', {})
         
+        # Lowercased input keys, first key wins as with an ordered scan
+        input_lower = {}
+        for input_key, input_value in input_data.items():
+            input_lower.setdefault(input_key.lower(), (input_key, input_value))
+        
         for field_name, field_schema in target_props.items():
             # Exact match
             if field_name in input_data:
@@ -120,28 +405,23 @@ class TransformPipeline:
                 continue
             
             # Case-insensitive match
-            for input_key, input_value in input_data.items():
-                if input_key.lower() == field_name.lower():
-                    result[field_name] = input_value
-                    break
+            match = input_lower.get(field_name.lower())
+            if match is not None:
+                result[field_name] = match[1]
             
             # Common renames
-            rename_map = {
-                'text': ['document', 'body', 'content', 'message'],
-                'summary': ['abstract', 'description', 'overview'],
-                'title': ['name', 'heading', 'subject'],
-                'id': ['_id', 'identifier', 'key']
-            }
-            
-            if field_name in rename_map:
-                for alt_name in rename_map[field_name]:
-                    if alt_name in input_data:
-                        result[field_name] = input_data[alt_name]
-                        break
+            for alt_name in _RENAME_MAP.get(field_name, ()):
+                if alt_name in input_data:
+                    result[field_name] = input_data[alt_name]
+                    break
+                match = input_lower.get(alt_name)
+                if match is not None:
+                    result[field_name] = match[1]
+                    break
             
             # Type coercions
             if field_name in result:
-                result[field_name] = await self._coerce_type(
+                result[field_name] = self._coerce_type(
                     result[field_name], field_schema
                 )
         
@@ -152,34 +432,14 @@ class TransformPipeline:
         
         return None
 
-    async def _coerce_type(self, value: Any, field_schema: dict) -> Any:
+    def _coerce_type(self, value: Any, field_schema: dict) -> Any:
         """Coerce value to match field schema type"""
         
-        target_type = field_schema.get('type')
+        coerce = _COERCERS.get(field_schema.get('type'))
+        if coerce is None:
+            return value
         
-        if target_type == 'string':
-            if not isinstance(value, str):
-                return str(value)
-        elif target_type == 'number':
-            if isinstance(value, str):
-                try:
-                    return float(value)
-                except ValueError:
-                    pass
-        elif target_type == 'integer':
-            if isinstance(value, str):
-                try:
-                    return int(value)
-                except ValueError:
-                    pass
-        elif target_type == 'array':
-            if not isinstance(value, list):
-                return [value]
-        elif target_type == 'boolean':
-            if isinstance(value, str):
-                return value.lower() in ['true', '1', 'yes']
-        
-        return value
+        return coerce(value)
 
     async def _get_mapping_hint(self, source_fp: str, target_fp: str) -> Optional[MappingHint]:
         """Get cached mapping hint"""
@@ -188,10 +448,21 @@ class TransformPipeline:
             select(MappingHint).where(
                 MappingHint.source_schema_fp == source_fp,
                 MappingHint.target_schema_fp == target_fp
-            ).order_by(MappingHint.success_count.desc())
+            ).order_by(MappingHint.success_count.desc()).limit(1)
         )
         return result.scalar_one_or_none()
 
+    async def _find_mapping_hint(self, source_fp: str, target_fp: str, recipe: list) -> Optional[MappingHint]:
+        """Existing hint for a schema pair with exactly this recipe"""
+        
+        result = await self.db.execute(
+            select(MappingHint).where(
+                MappingHint.source_schema_fp == source_fp,
+                MappingHint.target_schema_fp == target_fp
+            )
+        )
+        return next((hint for hint in result.scalars() if hint.recipe == recipe), None)
+
     async def _apply_mapping_hint(self, input_data: dict, mapping_hint: MappingHint) -> Optional[dict]:
         """Apply a mapping hint recipe"""
         
@@ -200,48 +471,20 @@ class TransformPipeline:
     async def _apply_recipe(self, input_data: dict, recipe: List[dict]) -> Optional[dict]:
         """Apply a transformation recipe"""
         
+        return self._run_recipe(input_data, recipe)
+
+    def _run_recipe(self, input_data: dict, recipe: List[dict]) -> Optional[dict]:
+        """Apply a transformation recipe without going through the event loop"""
+        
         try:
-            result = input_data.copy()
+            steps, fields = self._compile_recipe(recipe)
+            if fields is None:
+                result = input_data.copy()
+            else:
+                result = {f: input_data[f] for f in fields if f in input_data}
             
-            for operation in recipe:
-                op_type = operation.get('op')
-                
-                if op_type == 'rename':
-                    if operation['from'] in result:
-                        result[operation['to']] = result.pop(operation['from'])
-                
-                elif op_type == 'coerce':
-                    field = operation['field']
-                    if field in result:
-                        to_type = operation['to']
-                        if to_type == 'integer':
-                            result[field] = int(result[field])
-                        elif to_type == 'float':
-                            result[field] = float(result[field])
-                        elif to_type == 'string':
-                            result[field] = str(result[field])
-                
-                elif op_type == 'concat':
-                    fields = operation['fields']
-                    separator = operation.get('separator', ' ')
-                    values = [str(result.get(f, '')) for f in fields if f in result]
-                    if values:
-                        result[operation['into']] = separator.join(values)
-                
-                elif op_type == 'truncate':
-                    field = operation['field']
-                    max_chars = operation.get('max_chars', 1000)
-                    if field in result and isinstance(result[field], str):
-                        result[field] = result[field][:max_chars]
-                
-                elif op_type == 'default':
-                    field = operation['field']
-                    if field not in result or result[field] is None:
-                        result[field] = operation['value']
-                
-                elif op_type == 'pick':
-                    fields = operation.get('fields', [])
-                    result = {k: v for k, v in result.items() if k in fields}
+            for step in steps:
+                step(result)
             
             return result
             
@@ -249,22 +492,68 @@ class TransformPipeline:
             logger.error(f"Failed to apply recipe: {str(e)}")
             return None
 
+    def _compile_recipe(self, recipe: List[dict]) -> Tuple[List[RecipeStep], Optional[List[str]]]:
+        """
+        Compile a recipe into bound steps, once per recipe object
+        
+        Returns:
+            (steps, fields) where fields lists the only input fields a
+            recipe with a pick can carry through, or None for all of them
+        """
+        
+        key = id(recipe)
+        entry = self._recipe_cache.get(key)
+        if entry is not None and entry[0] is recipe:
+            self._recipe_cache.move_to_end(key)
+            return entry[1]
+        
+        operations = [op for op in recipe if op.get('op') in _RECIPE_OPS]
+        steps = [_RECIPE_OPS[op['op']](op) for op in operations]
+        
+        # Anything a pick recipe never mentions is dropped, so skip copying it
+        fields: Optional[List[str]] = None
+        if any(op['op'] == 'pick' for op in operations):
+            referenced: Dict[str, None] = {}
+            for op in operations:
+                referenced.update(dict.fromkeys(_operation_fields(op)))
+            fields = list(referenced)
+        
+        compiled = (steps, fields)
+        self._recipe_cache[key] = (recipe, compiled)
+        if len(self._recipe_cache) > self.recipe_cache_capacity:
+            self._recipe_cache.popitem(last=False)
+        
+        return compiled
+
     async def _validate_output(self, data: dict, schema: dict) -> bool:
         """Validate output against schema"""
         
-        try:
-            import jsonschema
-            jsonschema.validate(instance=data, schema=schema)
-            return True
-        except jsonschema.ValidationError:
-            return False
+        return self._get_validator(schema).is_valid(data)
+
+    def _get_validator(self, schema: dict):
+        """Get a compiled validator for a schema, building it once per fingerprint"""
+        
+        fingerprint = self._calculate_fingerprint(schema)
+        validator = self._validator_cache.get(fingerprint)
+        if validator is not None:
+            return validator
+        
+        validator_cls = validator_for(schema)
+        validator_cls.check_schema(schema)
+        validator = validator_cls(schema)
+        self._validator_cache[fingerprint] = validator
+        
+        return validator
 
     async def _check_llm_budget(self, chain_run: ChainRun) -> bool:
         """Check if LLM usage is within budget"""
         
         # Check run budget
         if chain_run.budget_cents:
-            spent = await self._calculate_spent(chain_run.id)
+            spent = self._spent.get(chain_run.id)
+            if spent is None:
+                spent = await self._calculate_spent(chain_run.id)
+                self._spent[chain_run.id] = spent
             estimated_llm_cost = 50  # Estimate 50 cents per LLM call
             if spent + estimated_llm_cost > chain_run.budget_cents:
                 return False
@@ -275,15 +564,16 @@ class TransformPipeline:
         """Calculate spent amount for run"""
         
         result = await self.db.execute(
-            select(TransformRecord).where(
+            select(func.coalesce(func.sum(TransformRecord.cost_cents), 0)).where(
                 TransformRecord.run_id == run_id
             )
         )
-        transforms = result.scalars().all()
+        total = result.scalar() or 0
         
-        total = 0
-        for transform in transforms:
-            total += transform.cost_cents or 0
+        # Include records not yet flushed
+        for transform in self._pending_records:
+            if transform.run_id == run_id:
+                total += transform.cost_cents or 0
         
         return total
 
@@ -310,15 +600,45 @@ class TransformPipeline:
             validated=True,
             cost_cents=0 if method != TransformMethod.LLM else 50  # Estimate
         )
-        self.db.add(transform)
+        self._pending_records.append(transform)
+        
+        if run_id in self._spent:
+            self._spent[run_id] += transform.cost_cents
+        
+        if len(self._pending_records) >= self.record_flush_size:
+            await self.flush_records()
+
+    async def flush_records(self):
+        """Write buffered transform records and counter updates in a single commit"""
+        
+        if not self._pending_records and not self._uncommitted:
+            return
+        
+        self.db.add_all(self._pending_records)
         await self.db.commit()
+        self._pending_records.clear()
+        self._uncommitted = False
 
     def _calculate_fingerprint(self, schema: dict) -> str:
         """Calculate fingerprint for schema"""
         
+        # Same schema object seen earlier in this pipeline
+        key = id(schema)
+        entry = self._fp_cache.get(key)
+        if entry is not None and entry[0] is schema:
+            self._fp_cache.move_to_end(key)
+            return entry[1]
+        
         # Canonicalize schema
-        canonical = json.dumps(schema, sort_keys=True)
-        return hashlib.sha256(canonical.encode()).hexdigest()
+        canonical = orjson.dumps(schema, option=orjson.OPT_SORT_KEYS)
+        fingerprint = hashlib.sha256(canonical).hexdigest()
+        
+        self._fp_cache[key] = (schema, fingerprint)
+        self._fp_cache.move_to_end(key)
+        if len(self._fp_cache) > self.fp_cache_capacity:
+            self._fp_cache.popitem(last=False)
+        
+        return fingerprint
 
     def _infer_schema(self, data: dict) -> dict:
         """Infer basic schema from data"""
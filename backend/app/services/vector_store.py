@@ -1,16 +1,120 @@
 import os
-from typing import List, Dict, Optional, Tuple
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, List, Dict, Optional, Tuple
 import numpy as np
+import orjson
+import torch
 from sentence_transformers import SentenceTransformer
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, VectorParams, PointStruct, Filter, FieldCondition, Range
+from qdrant_client.models import (
+    Distance, VectorParams, PointStruct, Filter, FieldCondition, Range,
+    HnswConfigDiff, OptimizersConfigDiff, PayloadSchemaType,
+    ScalarQuantization, ScalarQuantizationConfig, ScalarType,
+    SearchParams, QuantizationSearchParams, SearchRequest
+)
 import uuid
 
 from app.core.logging import logger
 
+# Compatible pairs of distinct JSON schema types, in both orders
+_COMPATIBLE_TYPES = frozenset(
+    pair
+    for a, b in (
+        ("string", "number"),
+        ("string", "integer"),
+        ("number", "integer"),
+        ("string", "boolean")
+    )
+    for pair in ((a, b), (b, a))
+)
+
+# Schema texts keyed by schema fingerprint (LRU)
+_SCHEMA_TEXT_CAPACITY = 2048
+_schema_texts: OrderedDict[str, str] = OrderedDict()
+
+def _canonical_schema_text(schema: dict) -> str:
+    """Text for a schema with fields and required names sorted, so equal schemas embed alike"""
+    
+    parts = [
+        f"{field}:{spec.get('type', 'unknown')}"
+        for field, spec in sorted(schema.get("properties", {}).items())
+    ]
+    
+    if "required" in schema:
+        parts.append("required:" + ",".join(sorted(schema["required"])))
+    
+    return " ".join(parts)
+
+def schema_fingerprint(schema: dict) -> str:
+    """Fingerprint a schema the same way the transform pipeline does"""
+    
+    return hashlib.sha256(orjson.dumps(schema, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+class _QueryVectorCache:
+    """Recent search results, reused for queries whose embedding is near a cached one"""
+    
+    def __init__(self, dim: int, capacity: int = 256, threshold: float = 0.97, ttl_seconds: float = 60.0):
+        self.capacity = capacity
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        
+        # Flat inner-product index over unit-norm query embeddings
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._keys: List[Optional[bytes]] = [None] * capacity
+        self._results: List[Any] = [None] * capacity
+        self._stored_at = np.zeros(capacity, dtype=np.float64)
+        self._used_at = np.zeros(capacity, dtype=np.float64)
+
+    def get(self, key: bytes, embedding: np.ndarray) -> Optional[Any]:
+        """Results cached for the same key and a near-identical query, if fresh"""
+        
+        now = time.monotonic()
+        scores = self._vectors @ embedding
+        
+        for slot in np.argsort(scores)[::-1]:
+            if scores[slot] < self.threshold:
+                break
+            if self._keys[slot] == key and now - self._stored_at[slot] <= self.ttl_seconds:
+                self._used_at[slot] = now
+                return self._results[slot]
+        
+        return None
+
+    def put(self, key: bytes, embedding: np.ndarray, results: Any):
+        """Cache results, replacing the least recently used slot"""
+        
+        now = time.monotonic()
+        slot = int(np.argmin(self._used_at))
+        
+        self._vectors[slot] = embedding
+        self._keys[slot] = key
+        self._results[slot] = results
+        self._stored_at[slot] = now
+        self._used_at[slot] = now
+
+    def clear(self):
+        """Drop every cached result"""
+        
+        self._vectors[:] = 0
+        self._keys = [None] * self.capacity
+        self._results = [None] * self.capacity
+        self._stored_at[:] = 0
+        self._used_at[:] = 0
+
 class VectorStore:
     """Vector database service using Qdrant for semantic search"""
     
+    __slots__ = (
+        'client', 'encoder', 'embedding_dim',
+        'emb_cache_capacity', '_emb_cache',
+        'encode_batch_size', 'encode_window_seconds', '_encode_queue', '_encode_worker',
+        '_agent_search_cache', '_schema_search_cache',
+        'agents_collection', 'schemas_collection', 'search_params', 'payload_indexes'
+    )
+    
     def __init__(self):
         self.client = QdrantClient(
             url=os.getenv("QDRANT_URL", "http://localhost:6333")
@@ -18,12 +122,65 @@ class VectorStore:
         
         # Initialize sentence transformer model
         self.encoder = SentenceTransformer('all-MiniLM-L6-v2')
+        
+        # Bound intra-op threads so uvicorn workers do not oversubscribe the CPU
+        torch.set_num_threads(int(os.getenv("TORCH_NUM_THREADS", "4")))
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Only settable before the first parallel op in this process
+            pass
+        
+        if self.encoder.device.type == "cuda":
+            # FP16 weights on GPU; CPU FP16 matmul is slower than FP32, so CPU stays on INT8/FP32
+            if os.getenv("MINILM_FP16", "1") == "1":
+                self.encoder.half()
+        elif os.getenv("EMBEDDING_QUANTIZATION", "int8") == "int8":
+            # INT8 dynamic quantization of the Linear layers (fbgemm/VNNI on x86)
+            torch.quantization.quantize_dynamic(
+                self.encoder,
+                {torch.nn.Linear},
+                dtype=torch.qint8,
+                inplace=True
+            )
         self.embedding_dim = 384
         
+        # get_embedding results keyed by blake2b digest of the text (LRU)
+        self.emb_cache_capacity = 4096
+        self._emb_cache: OrderedDict[bytes, np.ndarray] = OrderedDict()
+        
+        # Micro-batcher: concurrent cache misses share one encoder call
+        self.encode_batch_size = 32
+        self.encode_window_seconds = 0.005
+        self._encode_queue: Optional[asyncio.Queue] = None
+        self._encode_worker: Optional[asyncio.Task] = None
+        
+        # Client-side cache of search results per collection
+        self._agent_search_cache = _QueryVectorCache(self.embedding_dim)
+        self._schema_search_cache = _QueryVectorCache(self.embedding_dim)
+        
         # Collection names
         self.agents_collection = "agents"
         self.schemas_collection = "schemas"
         
+        # Search the INT8 vectors, then rescore an oversampled candidate set
+        self.search_params = SearchParams(
+            quantization=QuantizationSearchParams(rescore=True, oversampling=2.0)
+        )
+        
+        # Payload fields used in search filters, indexed so filtering
+        # does not fall back to a full scan
+        self.payload_indexes = {
+            self.agents_collection: {
+                "price_cents": PayloadSchemaType.INTEGER,
+                "success_rate": PayloadSchemaType.FLOAT,
+                "verification_level": PayloadSchemaType.KEYWORD
+            },
+            self.schemas_collection: {
+                "schema_fp": PayloadSchemaType.KEYWORD
+            }
+        }
+        
         # Initialize collections
         self._init_collections()
 
@@ -31,26 +188,44 @@ class VectorStore:
         """Initialize Qdrant collections"""
         
         try:
-            # Create agents collection
-            self.client.recreate_collection(
-                collection_name=self.agents_collection,
-                vectors_config=VectorParams(
-                    size=self.embedding_dim,
-                    distance=Distance.COSINE
-                )
-            )
+            # Create missing collections only, keeping existing points and indexes
+            existing = {c.name for c in self.client.get_collections().collections}
             
-            # Create schemas collection
-            self.client.recreate_collection(
-                collection_name=self.schemas_collection,
-                vectors_config=VectorParams(
-                    size=self.embedding_dim,
-                    distance=Distance.COSINE
-                )
-            )
+            for collection_name in (self.agents_collection, self.schemas_collection):
+                if collection_name not in existing:
+                    self.client.create_collection(
+                        collection_name=collection_name,
+                        vectors_config=VectorParams(
+                            size=self.embedding_dim,
+                            distance=Distance.COSINE,
+                            on_disk=True
+                        ),
+                        # INT8 copies stay in RAM for search, FP32 originals on disk for rescoring
+                        quantization_config=ScalarQuantization(
+                            scalar=ScalarQuantizationConfig(
+                                type=ScalarType.INT8,
+                                quantile=0.99,
+                                always_ram=True
+                            )
+                        ),
+                        hnsw_config=HnswConfigDiff(m=16, ef_construct=128),
+                        optimizers_config=OptimizersConfigDiff(
+                            memmap_threshold=20000,
+                            indexing_threshold=10000
+                        )
+                    )
             
-            logger.info("Vector store collections initialized")
+            # Creating an index that already exists is a no-op
+            for collection_name, fields in self.payload_indexes.items():
+                for field_name, field_schema in fields.items():
+                    self.client.create_payload_index(
+                        collection_name=collection_name,
+                        field_name=field_name,
+                        field_schema=field_schema
+                    )
             
+            logger.info("Vector store collections initialized")
+        
         except Exception as e:
             logger.error(f"Failed to initialize collections: {str(e)}")
 
@@ -93,6 +268,7 @@ class VectorStore:
             collection_name=self.agents_collection,
             points=[point]
         )
+        self._agent_search_cache.clear()
         
         logger.info(f"Indexed agent {agent_id} in vector store")
 
@@ -107,7 +283,75 @@ class VectorStore:
         # Generate query embedding
         query_embedding = await self.get_embedding(query)
         
+        # Reuse results of a near-identical recent query with the same filters
+        cache_key = orjson.dumps([top_k, filters], option=orjson.OPT_SORT_KEYS)
+        cached = self._agent_search_cache.get(cache_key, query_embedding)
+        if cached is not None:
+            return [dict(agent) for agent in cached]
+        
         # Build filter if provided
+        qdrant_filter = self._build_agent_filter(filters)
+        
+        # Search
+        results = self.client.search(
+            collection_name=self.agents_collection,
+            query_vector=query_embedding.tolist(),
+            filter=qdrant_filter,
+            search_params=self.search_params,
+            limit=top_k
+        )
+        
+        # Format results
+        agents = self._format_agent_results(results)
+        self._agent_search_cache.put(cache_key, query_embedding, agents)
+        
+        return [dict(agent) for agent in agents]
+
+    async def search_agents_many(
+        self,
+        queries: List[str],
+        top_k: int = 10,
+        filters: Optional[List[Optional[dict]]] = None
+    ) -> List[List[Dict]]:
+        """Search for several queries, sending every cache miss in one search_batch call"""
+        
+        filters_list = filters or [None] * len(queries)
+        embeddings = await self.encode_many(queries)
+        
+        agents_per_query: List[Optional[List[Dict]]] = []
+        misses = []
+        for i, (embedding, query_filters) in enumerate(zip(embeddings, filters_list)):
+            cache_key = orjson.dumps([top_k, query_filters], option=orjson.OPT_SORT_KEYS)
+            cached = self._agent_search_cache.get(cache_key, embedding)
+            agents_per_query.append(cached)
+            if cached is None:
+                misses.append((i, cache_key, embedding, query_filters))
+        
+        if misses:
+            batch_results = self.client.search_batch(
+                collection_name=self.agents_collection,
+                requests=[
+                    SearchRequest(
+                        vector=embedding.tolist(),
+                        filter=self._build_agent_filter(query_filters),
+                        params=self.search_params,
+                        limit=top_k,
+                        with_payload=True
+                    )
+                    for _, _, embedding, query_filters in misses
+                ]
+            )
+            
+            for (i, cache_key, embedding, _), results in zip(misses, batch_results):
+                agents = self._format_agent_results(results)
+                self._agent_search_cache.put(cache_key, embedding, agents)
+                agents_per_query[i] = agents
+        
+        return [[dict(agent) for agent in agents] for agents in agents_per_query]
+
+    def _build_agent_filter(self, filters: Optional[dict]) -> Optional[Filter]:
+        """Build the Qdrant filter for agent search filters"""
+        
         qdrant_filter = None
         if filters:
             conditions = []
@@ -135,15 +379,11 @@ class VectorStore:
             if conditions:
                 qdrant_filter = Filter(must=conditions)
         
-        # Search
-        results = self.client.search(
-            collection_name=self.agents_collection,
-            query_vector=query_embedding.tolist(),
-            filter=qdrant_filter,
-            limit=top_k
-        )
+        return qdrant_filter
+
+    def _format_agent_results(self, results) -> List[Dict]:
+        """Agent payloads annotated with their similarity score"""
         
-        # Format results
         agents = []
         for result in results:
             agent_data = result.payload
@@ -165,10 +405,16 @@ class VectorStore:
         # Generate embedding
         embedding = await self.get_embedding(schema_text)
         
+        cache_key = orjson.dumps(top_k)
+        cached = self._schema_search_cache.get(cache_key, embedding)
+        if cached is not None:
+            return list(cached)
+        
         # Search for similar schemas
         results = self.client.search(
             collection_name=self.schemas_collection,
             query_vector=embedding.tolist(),
+            search_params=self.search_params,
             limit=top_k
         )
         
@@ -179,7 +425,9 @@ class VectorStore:
                 result.score
             ))
         
-        return similar_schemas
+        self._schema_search_cache.put(cache_key, embedding, similar_schemas)
+        
+        return list(similar_schemas)
 
     async def index_schema(
         self,
@@ -190,14 +438,15 @@ class VectorStore:
         """Index a schema for similarity search"""
         
         # Create text representation
-        schema_text = self._create_schema_text(schema)
+        schema_text = self._create_schema_text(schema, schema_fp)
         
         # Generate embedding
         embedding = await self.get_embedding(schema_text)
         
-        # Store in Qdrant
+        # Store the unit-norm vector under an id derived from the fingerprint,
+        # so scoring can fetch it back without re-encoding
         point = PointStruct(
-            id=str(uuid.uuid4()),
+            id=self._schema_point_id(schema_fp),
             vector=embedding.tolist(),
             payload={
                 "schema_fp": schema_fp,
@@ -211,13 +460,44 @@ class VectorStore:
             collection_name=self.schemas_collection,
             points=[point]
         )
+        self._schema_search_cache.clear()
+
+    def _schema_point_id(self, schema_fp: str) -> str:
+        """Deterministic Qdrant point id for a schema fingerprint"""
+        
+        return str(uuid.uuid5(uuid.NAMESPACE_URL, f"schema:{schema_fp}"))
+
+    async def _get_schema_vectors(self, schema_fps: List[str]) -> Optional[List[np.ndarray]]:
+        """Stored vectors for indexed schemas, or None unless all of them are indexed"""
+        
+        point_ids = [self._schema_point_id(fp) for fp in schema_fps]
+        
+        try:
+            points = await asyncio.to_thread(
+                self.client.retrieve,
+                collection_name=self.schemas_collection,
+                ids=list(dict.fromkeys(point_ids)),
+                with_payload=False,
+                with_vectors=True
+            )
+        except Exception as e:
+            logger.warning(f"Failed to retrieve schema vectors: {str(e)}")
+            return None
+        
+        vectors = {str(point.id): point.vector for point in points}
+        if not all(point_id in vectors for point_id in point_ids):
+            return None
+        
+        return [np.asarray(vectors[point_id], dtype=np.float32) for point_id in point_ids]
 
     async def calculate_compatibility_score(
         self,
         source_schema: dict,
         target_schema: dict,
         source_data: Optional[dict] = None,
-        target_data: Optional[dict] = None
+        target_data: Optional[dict] = None,
+        source_fp: Optional[str] = None,
+        target_fp: Optional[str] = None
     ) -> float:
         """Calculate compatibility score between schemas"""
         
@@ -231,22 +511,21 @@ class VectorStore:
         }
         
         # Field overlap
-        source_fields = set(source_schema.get("properties", {}).keys())
-        target_fields = set(target_schema.get("properties", {}).keys())
+        source_props = source_schema.get("properties", {})
+        target_props = target_schema.get("properties", {})
+        common_fields = source_props.keys() & target_props.keys()
         
-        if source_fields and target_fields:
-            overlap = len(source_fields.intersection(target_fields))
-            field_overlap_score = overlap / max(len(source_fields), len(target_fields))
+        if source_props and target_props:
+            field_overlap_score = len(common_fields) / max(len(source_props), len(target_props))
             score += field_overlap_score * weights["field_overlap"]
         
-        # Type compatibility
+        # Type compatibility, one pass over the shared fields
+        type_total = len(common_fields)
         type_matches = 0
-        type_total = 0
         
-        for field in source_fields.intersection(target_fields):
-            type_total += 1
-            source_type = source_schema["properties"][field].get("type")
-            target_type = target_schema["properties"][field].get("type")
+        for field in common_fields:
+            source_type = source_props[field].get("type")
+            target_type = target_props[field].get("type")
             
             if source_type == target_type:
                 type_matches += 1
@@ -256,22 +535,29 @@ class VectorStore:
         if type_total > 0:
             score += (type_matches / type_total) * weights["type_compatibility"]
         
-        # Embedding similarity
-        source_text = self._create_schema_text(source_schema)
-        target_text = self._create_schema_text(target_schema)
+        # Embedding similarity, from the indexed vectors when both schemas are indexed
+        indexed = None
+        if source_fp and target_fp:
+            indexed = await self._get_schema_vectors([source_fp, target_fp])
         
-        source_embedding = await self.get_embedding(source_text)
-        target_embedding = await self.get_embedding(target_text)
+        if indexed is not None:
+            source_embedding, target_embedding = indexed
+        else:
+            source_text = self._create_schema_text(source_schema, source_fp)
+            target_text = self._create_schema_text(target_schema, target_fp)
+            
+            source_embedding, target_embedding = await self.get_embeddings(
+                [source_text, target_text]
+            )
         
-        cosine_sim = np.dot(source_embedding, target_embedding) / (
-            np.linalg.norm(source_embedding) * np.linalg.norm(target_embedding)
-        )
+        # Embeddings are unit-norm, so cosine similarity is the dot product
+        cosine_sim = float(np.dot(source_embedding, target_embedding))
         score += max(0, cosine_sim) * weights["embedding_similarity"]
         
         # Required fields coverage
         source_required = set(source_schema.get("required", []))
         if source_required:
-            covered = len(source_required.intersection(target_fields))
+            covered = len(source_required & target_props.keys())
             score += (covered / len(source_required)) * weights["required_fields"]
         else:
             score += weights["required_fields"]  # No required fields is compatible
@@ -287,9 +573,159 @@ class VectorStore:
         return min(1.0, score)
 
     async def get_embedding(self, text: str) -> np.ndarray:
-        """Generate embedding for text"""
+        """Generate a unit-norm embedding for text, reusing cached results"""
+        
+        return (await self.get_embeddings([text]))[0]
+
+    async def get_embeddings(self, texts: List[str]) -> List[np.ndarray]:
+        """Embeddings for several texts, encoding all cache misses in one batch"""
+        
+        keys = [hashlib.blake2b(text.encode(), digest_size=16).digest() for text in texts]
+        embeddings: List[Optional[np.ndarray]] = []
+        missing: Dict[bytes, List[int]] = {}
+        
+        for i, key in enumerate(keys):
+            embedding = self._emb_cache.get(key)
+            if embedding is not None:
+                self._emb_cache.move_to_end(key)
+            else:
+                missing.setdefault(key, []).append(i)
+            embeddings.append(embedding)
+        
+        if missing:
+            miss_keys = list(missing)
+            encoded = await self._encode_coalesced(
+                [texts[missing[key][0]] for key in miss_keys]
+            )
+            
+            for key, embedding in zip(miss_keys, encoded):
+                for i in missing[key]:
+                    embeddings[i] = embedding
+                self._emb_cache[key] = embedding
+            
+            while len(self._emb_cache) > self.emb_cache_capacity:
+                self._emb_cache.popitem(last=False)
         
-        return self.encoder.encode(text)
+        return embeddings
+
+    async def encode_many(self, texts: List[str], batch_size: int = 64, evict: bool = True) -> np.ndarray:
+        """Embed a bulk list of texts (catalog imports, re-indexing) as one (n, dim) array
+        
+        With evict=False new embeddings only fill spare cache room, so a large
+        bulk job does not push out entries other callers are still using.
+        """
+        
+        keys = [hashlib.blake2b(text.encode(), digest_size=16).digest() for text in texts]
+        embeddings = np.empty((len(texts), self.embedding_dim), dtype=np.float32)
+        missing: Dict[bytes, List[int]] = {}
+        
+        for i, key in enumerate(keys):
+            embedding = self._emb_cache.get(key)
+            if embedding is not None:
+                embeddings[i] = embedding
+            else:
+                missing.setdefault(key, []).append(i)
+        
+        if missing:
+            miss_keys = list(missing)
+            
+            # encode() length-sorts internally, so each mini-batch pads only
+            # to its own longest text; results come back in input order
+            encoded = await asyncio.to_thread(
+                self.encoder.encode,
+                [texts[missing[key][0]] for key in miss_keys],
+                batch_size=batch_size,
+                convert_to_numpy=True,
+                convert_to_tensor=False,
+                normalize_embeddings=True,
+                show_progress_bar=False
+            )
+            
+            for key, embedding in zip(miss_keys, encoded):
+                embeddings[missing[key]] = embedding
+                if evict or len(self._emb_cache) < self.emb_cache_capacity:
+                    self._emb_cache[key] = embedding
+            
+            while len(self._emb_cache) > self.emb_cache_capacity:
+                self._emb_cache.popitem(last=False)
+        
+        return embeddings
+
+    async def _encode_coalesced(self, texts: List[str]) -> np.ndarray:
+        """Encode texts via the micro-batcher, off the event loop"""
+        
+        loop = asyncio.get_running_loop()
+        
+        if self._encode_queue is None or self._encode_worker is None or self._encode_worker.done():
+            self._encode_queue = asyncio.Queue()
+            self._encode_worker = loop.create_task(self._run_encode_worker())
+        
+        future = loop.create_future()
+        await self._encode_queue.put((texts, future))
+        return await future
+
+    async def _run_encode_worker(self):
+        """Drain queued encode requests in batches collected over a short window"""
+        
+        queue = self._encode_queue
+        
+        while True:
+            pending = [await queue.get()]
+            try:
+                await asyncio.sleep(self.encode_window_seconds)
+                
+                count = len(pending[0][0])
+                while count < self.encode_batch_size and not queue.empty():
+                    item = queue.get_nowait()
+                    pending.append(item)
+                    count += len(item[0])
+                
+                texts = [text for item_texts, _ in pending for text in item_texts]
+                
+                try:
+                    # One oversized request still runs in forward passes of encode_batch_size
+                    encoded = await asyncio.to_thread(
+                        self.encoder.encode,
+                        texts,
+                        batch_size=min(len(texts), self.encode_batch_size),
+                        convert_to_numpy=True,
+                        convert_to_tensor=False,
+                        normalize_embeddings=True,
+                        show_progress_bar=False
+                    )
+                except Exception as e:
+                    logger.error(f"Embedding batch failed: {str(e)}")
+                    for _, future in pending:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                
+                offset = 0
+                for item_texts, future in pending:
+                    if not future.done():
+                        future.set_result(encoded[offset:offset + len(item_texts)])
+                    offset += len(item_texts)
+            finally:
+                # Never leave a caller waiting, also when the worker is cancelled
+                for _, future in pending:
+                    if not future.done():
+                        future.cancel()
+
+    async def close(self):
+        """Stop the encode micro-batcher, cancelling requests it has not served"""
+        
+        if self._encode_worker is not None:
+            self._encode_worker.cancel()
+            await asyncio.gather(self._encode_worker, return_exceptions=True)
+        
+        if self._encode_queue is not None:
+            while not self._encode_queue.empty():
+                _, future = self._encode_queue.get_nowait()
+                if not future.done():
+                    future.cancel()
+        
+        self._encode_queue = None
+        self._encode_worker = None
 
     def _create_agent_text(
         self,
@@ -306,45 +742,42 @@ class VectorStore:
         if description:
             parts.append(description)
         
-        # Add schema field names
+        # Add schema field names, sorted so key order does not change the text
         if input_schema and "properties" in input_schema:
-            parts.append("input: " + " ".join(input_schema["properties"].keys()))
+            parts.append("input: " + " ".join(sorted(input_schema["properties"])))
         
         if output_schema and "properties" in output_schema:
-            parts.append("output: " + " ".join(output_schema["properties"].keys()))
+            parts.append("output: " + " ".join(sorted(output_schema["properties"])))
         
         # Add sample response keys
         if sample_response:
-            parts.append("sample: " + " ".join(str(sample_response)[:200]))
+            sample = orjson.dumps(sample_response, default=str, option=orjson.OPT_SORT_KEYS).decode()
+            parts.append("sample: " + " ".join(sample[:200]))
         
         return " ".join(parts)
 
-    def _create_schema_text(self, schema: dict) -> str:
-        """Create text representation of schema for embedding"""
+    def _create_schema_text(self, schema: dict, schema_fp: Optional[str] = None) -> str:
+        """Create text representation of schema for embedding, cached by fingerprint"""
         
-        parts = []
+        if schema_fp is None:
+            return _canonical_schema_text(schema)
         
-        if "properties" in schema:
-            for field, spec in schema["properties"].items():
-                parts.append(f"{field}:{spec.get('type', 'unknown')}")
+        text = _schema_texts.get(schema_fp)
+        if text is not None:
+            _schema_texts.move_to_end(schema_fp)
+            return text
         
-        if "required" in schema:
-            parts.append("required:" + ",".join(schema["required"]))
+        text = _canonical_schema_text(schema)
+        _schema_texts[schema_fp] = text
+        if len(_schema_texts) > _SCHEMA_TEXT_CAPACITY:
+            _schema_texts.popitem(last=False)
         
-        return " ".join(parts)
+        return text
 
     def _are_types_compatible(self, type1: str, type2: str) -> bool:
         """Check if two JSON schema types are compatible"""
         
-        compatible = {
-            ("string", "number"),
-            ("string", "integer"),
-            ("number", "integer"),
-            ("integer", "number"),
-            ("string", "boolean")
-        }
-        
-        return (type1, type2) in compatible or (type2, type1) in compatible
+        return (type1, type2) in _COMPATIBLE_TYPES
 
     def _calculate_data_similarity(self, data1: dict, data2: dict) -> float:
         """Calculate similarity between two data objects"""
@@ -361,3 +794,13 @@ class VectorStore:
         
         overlap = len(keys1.intersection(keys2))
         return overlap / max(len(keys1), len(keys2))
+
+_vector_store: Optional[VectorStore] = None
+
+def get_vector_store() -> VectorStore:
+    """Process-wide VectorStore, so the encoder and Qdrant client load once per worker"""
+    
+    global _vector_store
+    if _vector_store is None:
+        _vector_store = VectorStore()
+    return _vector_store
@@ -1,11 +1,12 @@
-from typing import Optional
+from typing import Optional, List, Tuple
 from decimal import Decimal
 from datetime import datetime
 import uuid
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 
-from app.models import Wallet, Transaction, User
+from app.models import Wallet, Transaction, User, ChainRun
 from app.models.wallet import TransactionType, TransactionStatus
 from app.core.logging import logger
 
@@ -43,6 +44,37 @@ class WalletService:
         
         return wallet
 
+    async def _load_chain_run(self, run_id) -> Optional[ChainRun]:
+        """Chain run by primary key, served from the identity map when already loaded"""
+        
+        return await self.db.get(ChainRun, uuid.UUID(str(run_id)))
+
+    async def _claim_transaction(
+        self,
+        user_id: str,
+        tx_type: TransactionType,
+        amount_cents: int,
+        external_id: str,
+        metadata: dict
+    ) -> bool:
+        """Insert a completed transaction unless external_id is already recorded"""
+        
+        # The unique external_id makes the insert itself the idempotency check
+        result = await self.db.execute(
+            pg_insert(Transaction)
+            .values(
+                wallet_id=select(Wallet.id).where(Wallet.user_id == user_id).scalar_subquery(),
+                type=tx_type,
+                amount_cents=amount_cents,
+                status=TransactionStatus.COMPLETED,
+                external_id=external_id,
+                transaction_metadata=metadata
+            )
+            .on_conflict_do_nothing(index_elements=[Transaction.external_id])
+            .returning(Transaction.id)
+        )
+        return result.scalar_one_or_none() is not None
+
     async def create_hold(
         self,
         user_id: str,
@@ -51,42 +83,33 @@ class WalletService:
     ) -> str:
         """Create a hold on wallet funds (idempotent)"""
         
-        # Check for existing transaction
-        result = await self.db.execute(
-            select(Transaction).where(
-                Transaction.external_id == external_id
+        # Claim the hold and reserve funds in one savepoint; a failed balance check undoes both
+        async with self.db.begin_nested():
+            claimed = await self._claim_transaction(
+                user_id,
+                TransactionType.HOLD,
+                amount_cents,
+                external_id,
+                {"timestamp": datetime.utcnow().isoformat()}
             )
-        )
-        existing = result.scalar_one_or_none()
-        
-        if existing:
+            
+            if claimed:
+                result = await self.db.execute(
+                    update(Wallet)
+                    .where(
+                        Wallet.user_id == user_id,
+                        (Wallet.balance_cents - Wallet.reserved_cents) >= amount_cents
+                    )
+                    .values(reserved_cents=Wallet.reserved_cents + amount_cents)
+                    .returning(Wallet.id)
+                )
+                if result.scalar_one_or_none() is None:
+                    raise ValueError(f"Insufficient funds. Required: {amount_cents}")
+        
+        if not claimed:
             logger.info(f"Hold already exists: {external_id}")
             return external_id
         
-        # Get wallet
-        wallet = await self.get_wallet(user_id)
-        
-        # Check sufficient balance
-        available = wallet.balance_cents - wallet.reserved_cents
-        if available < amount_cents:
-            raise ValueError(f"Insufficient funds. Available: {available}, Required: {amount_cents}")
-        
-        # Create hold transaction
-        transaction = Transaction(
-            wallet_id=wallet.id,
-            type=TransactionType.HOLD,
-            amount_cents=amount_cents,
-            status=TransactionStatus.COMPLETED,
-            external_id=external_id,
-            transaction_metadata={
-                "timestamp": datetime.utcnow().isoformat()
-            }
-        )
-        self.db.add(transaction)
-        
-        # Update reserved amount
-        wallet.reserved_cents += amount_cents
-        
         await self.db.commit()
         
         logger.info(f"Created hold: {external_id} for {amount_cents} cents")
@@ -100,60 +123,66 @@ class WalletService:
     ) -> str:
         """Settle payment for a successful node execution"""
         
-        external_id = f"settle_{run_id}_{node_id}"
-        
-        # Check for existing settlement
-        result = await self.db.execute(
-            select(Transaction).where(
-                Transaction.external_id == external_id
-            )
-        )
-        existing = result.scalar_one_or_none()
-        
-        if existing:
-            logger.info(f"Settlement already exists: {external_id}")
-            return external_id
+        settled = await self.settle_many(run_id, [(node_id, amount_cents)])
+        return settled[0]
+
+    async def settle_many(
+        self,
+        run_id: str,
+        node_amounts: List[Tuple[str, int]]
+    ) -> List[str]:
+        """Settle payments for several successful nodes in one commit"""
         
         # Get run owner's wallet
-        from app.models import ChainRun
-        run_result = await self.db.execute(
-            select(ChainRun).where(ChainRun.id == run_id)
-        )
-        chain_run = run_result.scalar_one_or_none()
+        chain_run = await self._load_chain_run(run_id)
         
         if not chain_run:
             raise ValueError(f"Chain run {run_id} not found")
         
-        wallet = await self.get_wallet(chain_run.owner_user_id)
-        
-        # Calculate platform fee
-        platform_fee = int(amount_cents * self.platform_fee_percent / 100)
-        agent_payment = amount_cents - platform_fee
-        
-        # Create settlement transaction
-        transaction = Transaction(
-            wallet_id=wallet.id,
-            type=TransactionType.SETTLE,
-            amount_cents=amount_cents,
-            status=TransactionStatus.COMPLETED,
-            external_id=external_id,
-            transaction_metadata={
-                "node_id": node_id,
-                "platform_fee": platform_fee,
-                "agent_payment": agent_payment
-            }
-        )
-        self.db.add(transaction)
-        
-        # Update reserved amount
-        wallet.reserved_cents = max(0, wallet.reserved_cents - amount_cents)
+        external_ids = []
+        settled_cents = 0
         
-        # TODO: Credit agent owner's wallet with agent_payment
-        
-        await self.db.commit()
+        for node_id, amount_cents in node_amounts:
+            external_id = f"settle_{run_id}_{node_id}"
+            external_ids.append(external_id)
+            
+            # Calculate platform fee
+            platform_fee = int(amount_cents * self.platform_fee_percent / 100)
+            agent_payment = amount_cents - platform_fee
+            
+            # Create settlement transaction
+            claimed = await self._claim_transaction(
+                chain_run.owner_user_id,
+                TransactionType.SETTLE,
+                amount_cents,
+                external_id,
+                {
+                    "node_id": node_id,
+                    "platform_fee": platform_fee,
+                    "agent_payment": agent_payment
+                }
+            )
+            
+            if not claimed:
+                logger.info(f"Settlement already exists: {external_id}")
+                continue
+            
+            settled_cents += amount_cents
+            logger.info(f"Settled payment: {external_id} for {amount_cents} cents")
+        
+        if settled_cents:
+            # Release the reserved amount for every new settlement at once
+            await self.db.execute(
+                update(Wallet)
+                .where(Wallet.user_id == chain_run.owner_user_id)
+                .values(reserved_cents=func.greatest(0, Wallet.reserved_cents - settled_cents))
+            )
+            
+            # TODO: Credit agent owners' wallets with agent_payment
+            
+            await self.db.commit()
         
-        logger.info(f"Settled payment: {external_id} for {amount_cents} cents")
-        return external_id
+        return external_ids
 
     async def refund_node_payment(
         self,
@@ -164,24 +193,8 @@ class WalletService:
         
         external_id = f"refund_{run_id}_{node_id}"
         
-        # Check for existing refund
-        result = await self.db.execute(
-            select(Transaction).where(
-                Transaction.external_id == external_id
-            )
-        )
-        existing = result.scalar_one_or_none()
-        
-        if existing:
-            logger.info(f"Refund already exists: {external_id}")
-            return external_id
-        
         # Get run and estimate node cost
-        from app.models import ChainRun, Agent
-        run_result = await self.db.execute(
-            select(ChainRun).where(ChainRun.id == run_id)
-        )
-        chain_run = run_result.scalar_one_or_none()
+        chain_run = await self._load_chain_run(run_id)
         
         if not chain_run:
             raise ValueError(f"Chain run {run_id} not found")
@@ -190,25 +203,31 @@ class WalletService:
         # In production, track exact reserved amount per node
         refund_amount = 50  # cents
         
-        wallet = await self.get_wallet(chain_run.owner_user_id)
-        
         # Create refund transaction
-        transaction = Transaction(
-            wallet_id=wallet.id,
-            type=TransactionType.REFUND,
-            amount_cents=refund_amount,
-            status=TransactionStatus.COMPLETED,
-            external_id=external_id,
-            transaction_metadata={
+        claimed = await self._claim_transaction(
+            chain_run.owner_user_id,
+            TransactionType.REFUND,
+            refund_amount,
+            external_id,
+            {
                 "node_id": node_id,
                 "reason": "node_failed"
             }
         )
-        self.db.add(transaction)
+        
+        if not claimed:
+            logger.info(f"Refund already exists: {external_id}")
+            return external_id
         
         # Update reserved amount
-        wallet.reserved_cents = max(0, wallet.reserved_cents - refund_amount)
-        wallet.balance_cents += refund_amount
+        await self.db.execute(
+            update(Wallet)
+            .where(Wallet.user_id == chain_run.owner_user_id)
+            .values(
+                reserved_cents=func.greatest(0, Wallet.reserved_cents - refund_amount),
+                balance_cents=Wallet.balance_cents + refund_amount
+            )
+        )
         
         await self.db.commit()
         
@@ -224,44 +243,30 @@ class WalletService:
         
         external_id = f"refund_unused_{run_id}"
         
-        # Check for existing refund
-        result = await self.db.execute(
-            select(Transaction).where(
-                Transaction.external_id == external_id
-            )
-        )
-        existing = result.scalar_one_or_none()
-        
-        if existing:
-            return external_id
-        
         # Get run owner's wallet
-        from app.models import ChainRun
-        run_result = await self.db.execute(
-            select(ChainRun).where(ChainRun.id == run_id)
-        )
-        chain_run = run_result.scalar_one_or_none()
+        chain_run = await self._load_chain_run(run_id)
         
         if not chain_run:
             raise ValueError(f"Chain run {run_id} not found")
         
-        wallet = await self.get_wallet(chain_run.owner_user_id)
-        
         # Create refund transaction
-        transaction = Transaction(
-            wallet_id=wallet.id,
-            type=TransactionType.REFUND,
-            amount_cents=amount_cents,
-            status=TransactionStatus.COMPLETED,
-            external_id=external_id,
-            transaction_metadata={
-                "reason": "unused_budget"
-            }
+        claimed = await self._claim_transaction(
+            chain_run.owner_user_id,
+            TransactionType.REFUND,
+            amount_cents,
+            external_id,
+            {"reason": "unused_budget"}
         )
-        self.db.add(transaction)
+        
+        if not claimed:
+            return external_id
         
         # Update amounts
-        wallet.reserved_cents = max(0, wallet.reserved_cents - amount_cents)
+        await self.db.execute(
+            update(Wallet)
+            .where(Wallet.user_id == chain_run.owner_user_id)
+            .values(reserved_cents=func.greatest(0, Wallet.reserved_cents - amount_cents))
+        )
         
         await self.db.commit()
         
@@ -273,46 +278,32 @@ class WalletService:
         
         external_id = f"refund_all_{run_id}"
         
-        # Check for existing refund
-        result = await self.db.execute(
-            select(Transaction).where(
-                Transaction.external_id == external_id
-            )
-        )
-        existing = result.scalar_one_or_none()
-        
-        if existing:
-            return
-        
         # Get run and wallet
-        from app.models import ChainRun
-        run_result = await self.db.execute(
-            select(ChainRun).where(ChainRun.id == run_id)
-        )
-        chain_run = run_result.scalar_one_or_none()
+        chain_run = await self._load_chain_run(run_id)
         
         if not chain_run:
             return
         
-        wallet = await self.get_wallet(chain_run.owner_user_id)
-        
         # Refund full reserved amount
         refund_amount = chain_run.reserved_cents
         
         if refund_amount > 0:
-            transaction = Transaction(
-                wallet_id=wallet.id,
-                type=TransactionType.REFUND,
-                amount_cents=refund_amount,
-                status=TransactionStatus.COMPLETED,
-                external_id=external_id,
-                transaction_metadata={
-                    "reason": "run_failed"
-                }
+            claimed = await self._claim_transaction(
+                chain_run.owner_user_id,
+                TransactionType.REFUND,
+                refund_amount,
+                external_id,
+                {"reason": "run_failed"}
             )
-            self.db.add(transaction)
             
-            wallet.reserved_cents = max(0, wallet.reserved_cents - refund_amount)
+            if not claimed:
+                return
+            
+            await self.db.execute(
+                update(Wallet)
+                .where(Wallet.user_id == chain_run.owner_user_id)
+                .values(reserved_cents=func.greatest(0, Wallet.reserved_cents - refund_amount))
+            )
             
             await self.db.commit()
             
@@ -326,37 +317,28 @@ class WalletService:
     ) -> str:
         """Top up wallet from Stripe payment (idempotent)"""
         
-        # Check for existing transaction
-        result = await self.db.execute(
-            select(Transaction).where(
-                Transaction.external_id == stripe_event_id
-            )
-        )
-        existing = result.scalar_one_or_none()
-        
-        if existing:
-            logger.info(f"Topup already processed: {stripe_event_id}")
-            return stripe_event_id
-        
-        # Get wallet
-        wallet = await self.get_wallet(user_id)
-        
         # Create topup transaction
-        transaction = Transaction(
-            wallet_id=wallet.id,
-            type=TransactionType.TOPUP,
-            amount_cents=amount_cents,
-            status=TransactionStatus.COMPLETED,
-            external_id=stripe_event_id,
-            transaction_metadata={
+        claimed = await self._claim_transaction(
+            user_id,
+            TransactionType.TOPUP,
+            amount_cents,
+            stripe_event_id,
+            {
                 "payment_method": "stripe",
                 "timestamp": datetime.utcnow().isoformat()
             }
         )
-        self.db.add(transaction)
+        
+        if not claimed:
+            logger.info(f"Topup already processed: {stripe_event_id}")
+            return stripe_event_id
         
         # Update balance
-        wallet.balance_cents += amount_cents
+        await self.db.execute(
+            update(Wallet)
+            .where(Wallet.user_id == user_id)
+            .values(balance_cents=Wallet.balance_cents + amount_cents)
+        )
         
         await self.db.commit()
         
@@ -1,11 +1,15 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
+import os
 import uvicorn
 
 from app.database import init_db
 from app.api import auth, agents, chains
 from app.core.logging import logger
+from app.services.vector_store import get_vector_store
+from app.services.llm_cache import close_persistent_caches
+from app.services.llm_gateway import close_llm_gateway
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -13,9 +17,16 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info("Starting GPTGram API...")
     init_db()
+    
+    # Load the embedding model and run one encode before the first request
+    app.state.vector_store = get_vector_store()
+    await app.state.vector_store.get_embedding("warmup")
     yield
     # Shutdown
     logger.info("Shutting down GPTGram API...")
+    await close_llm_gateway()
+    await app.state.vector_store.close()
+    close_persistent_caches()
 
 # Create FastAPI app
 app = FastAPI(
@@ -53,9 +64,21 @@ async def health():
     return {"status": "healthy"}
 
 if __name__ == "__main__":
-    uvicorn.run(
-        "main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True
-    )
+    if os.getenv("ENV") == "dev":
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            reload=True
+        )
+    else:
+        # uvloop/httptools ship with uvicorn[standard]; keep TORCH_NUM_THREADS x workers within the core count
+        uvicorn.run(
+            "main:app",
+            host="0.0.0.0",
+            port=8000,
+            workers=int(os.getenv("WEB_CONCURRENCY", "4")),
+            loop="uvloop",
+            http="httptools",
+            log_level="info"
+        )
@@ -6,18 +6,26 @@ For testing without full Docker setup
 
 from fastapi import FastAPI, HTTPException, Request, Body, Depends, Form
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response
 from pydantic import BaseModel
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
+from collections import OrderedDict, defaultdict, Counter
 import time
+import asyncio
+import itertools
+import bisect
 import uuid
+import secrets
 import random
 import sys
 import os
 import hmac
 import hashlib
 import json
-import requests
+import re
+import httpx
+from urllib.parse import urlsplit
 
 # Add app directory to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
@@ -40,12 +48,21 @@ import json
 import hmac
 import hashlib
 from datetime import datetime
-import stripe
 
-# Configure Stripe
-stripe.api_key = ""
+import orjson
 
-app = FastAPI(title="GPTGram Test Server")
+app = FastAPI(title="GPTGram Test Server", default_response_class=ORJSONResponse)
+
+# Shared async HTTP client for webhook calls (connection pooling, no event-loop blocking)
+HTTP = httpx.AsyncClient(timeout=30.0, headers={"Content-Type": "application/json"})
+
+@app.on_event("shutdown")
+async def close_http_client():
+    await HTTP.aclose()
+
+# LRU of mock webhook responses keyed by (url, body); the mocks are pure functions of their input
+WEBHOOK_CACHE_SIZE = int(os.getenv("WEBHOOK_CACHE_SIZE", "512"))
+_webhook_cache = OrderedDict()
 
 # Enable CORS
 app.add_middleware(
@@ -59,11 +76,13 @@ app.add_middleware(
 # In-memory databases (for testing)
 agents = {}  # Agent storage
 agents_db = []
+chains = {}  # Chain storage by ID
 chains_db = []
 runs_db = []  # Add runs database
 runs = {}  # Run storage by ID
 users = {}
 wallets = {}
+hmac_keys = {}  # Encoded n8n HMAC secrets by agent ID (kept out of API responses)
 
 # Test data
 demo_user = {
@@ -75,6 +94,67 @@ demo_user = {
 }
 users["demo"] = demo_user
 
+# Secondary index over agents, maintained on create/delete
+_agents_by_input_field = defaultdict(set)
+
+def _schema_fields(schema: Optional[Dict]) -> List[str]:
+    """Field names of a JSON schema (its properties, or its top-level keys)"""
+    if not schema:
+        return []
+    return list(schema.get("properties", schema))
+
+def _index_agent(agent_data: Dict):
+    for field in _schema_fields(agent_data.get("input_schema")):
+        _agents_by_input_field[field].add(agent_data["id"])
+
+def _unindex_agent(agent_data: Dict):
+    for field in _schema_fields(agent_data.get("input_schema")):
+        _agents_by_input_field[field].discard(agent_data["id"])
+
+# List responses are rebuilt only after a write bumps the store's version
+_store_versions = {"agents": 0, "chains": 0, "runs": 0}
+_listing_cache = {}
+
+def _bump_version(store: str):
+    _store_versions[store] += 1
+
+def _cached_listing(store: str, build) -> list:
+    """Combined listing for a store, reused until the store changes"""
+    version = _store_versions[store]
+    cached = _listing_cache.get(store)
+    if cached is None or cached[0] != version:
+        cached = (version, build())
+        _listing_cache[store] = cached
+    return cached[1]
+
+# Sequential IDs for saved chains and executions (unique even within one second)
+_chain_id_seq = itertools.count(1)
+_execution_id_seq = itertools.count(1)
+
+_DEMO_CHAINS = [
+    {
+        "id": "1",
+        "name": "Text Processing Pipeline",
+        "nodes": 3,
+        "estimated_cost_cents": 155
+    }
+]
+
+_DEMO_RUNS = [
+    {
+        "run_id": "1",
+        "chain_name": "Text Processing Pipeline",
+        "status": "succeeded",
+        "started_at": "2025-10-31T10:30:00",
+        "spent_cents": 155,
+        "nodes_executed": 3
+    }
+]
+
+# Demo-only listings serialized once; served as-is while nothing has been stored
+_DEMO_CHAINS_BYTES = orjson.dumps(_DEMO_CHAINS)
+_DEMO_RUNS_BYTES = orjson.dumps(_DEMO_RUNS)
+
 # Models
 class UserRegister(BaseModel):
     email: str
@@ -106,9 +186,21 @@ class Chain(BaseModel):
 async def root():
     return {"message": "GPTGram Test Server Running"}
 
+# Health timestamps are reformatted at most once per 10 ms window
+_HEALTH_TS_WINDOW_MS = 10
+_health_ts = (None, "")
+
+def _health_timestamp() -> str:
+    global _health_ts
+    window = int(time.time() * 1000) // _HEALTH_TS_WINDOW_MS
+    if _health_ts[0] != window:
+        iso = datetime.utcfromtimestamp(window * _HEALTH_TS_WINDOW_MS / 1000).isoformat()
+        _health_ts = (window, iso)
+    return _health_ts[1]
+
 @app.get("/health")
 async def health():
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
+    return {"status": "healthy", "timestamp": _health_timestamp()}
 
 @app.post("/api/auth/register")
 async def register(user: UserRegister):
@@ -116,7 +208,7 @@ async def register(user: UserRegister):
         raise HTTPException(400, "Username already exists")
     
     new_user = {
-        "id": str(uuid.uuid4()),
+        "id": secrets.token_hex(16),
         "username": user.username,
         "email": user.email,
         "password": user.password,
@@ -143,46 +235,62 @@ async def get_current_user():
 @app.get("/api/agents")
 async def list_agents():
     # Return only user-created agents (no hardcoded demos)
-    return list(agents.values())
+    return _cached_listing("agents", lambda: list(agents.values()))
 
-def generate_hmac_signature(payload: str, secret: str) -> str:
+def generate_hmac_signature(payload: bytes, key: bytes) -> str:
     """Generate HMAC SHA256 signature for n8n webhook"""
-    return hmac.new(
-        secret.encode('utf-8'),
-        payload.encode('utf-8'),
-        hashlib.sha256
-    ).hexdigest()
+    # One-shot C implementation, no Python-level HMAC object
+    return hmac.digest(key, payload, 'sha256').hex()
 
-async def call_n8n_webhook(url: str, data: dict, hmac_secret: str = None) -> dict:
+# Local mock endpoints by keyword in the n8n webhook path, in match priority order
+_MOCK_ROUTES = {
+    "sentiment": "http://localhost:8000/api/mock/n8n/sentiment",
+    "translation": "http://localhost:8000/api/mock/n8n/translation",
+    "summarize": "http://localhost:8000/api/mock/n8n/summarize"
+}
+
+async def call_n8n_webhook(url: str, data: dict, hmac_key: Optional[bytes] = None) -> dict:
     """Call n8n webhook with HMAC authentication"""
     headers = {"Content-Type": "application/json"}
     
     # For testing, redirect to local mock endpoints
-    if "templatechat.app.n8n.cloud" in url:
+    parts = urlsplit(url)
+    if "templatechat.app.n8n.cloud" in parts.netloc:
         # Use local mock endpoints instead
-        if "sentiment" in url:
-            url = "http://localhost:8000/api/mock/n8n/sentiment"
-        elif "translation" in url:
-            url = "http://localhost:8000/api/mock/n8n/translation"
-        elif "summarize" in url:
-            url = "http://localhost:8000/api/mock/n8n/summarize"
+        for keyword, mock_url in _MOCK_ROUTES.items():
+            if keyword in parts.path:
+                url = mock_url
+                break
         print(f"Redirecting to mock endpoint: {url}")
     
+    # Serialize once; the signed bytes are exactly the bytes sent
+    body = json.dumps(data, separators=(',', ':')).encode('utf-8')
+    
     # Add HMAC signature if secret provided
-    if hmac_secret:
-        payload = json.dumps(data, separators=(',', ':'))
-        signature = generate_hmac_signature(payload, hmac_secret)
+    if hmac_key:
+        signature = generate_hmac_signature(body, hmac_key)
         headers["X-GPTGRAM-Signature"] = f"sha256={signature}"
-        headers["X-GPTGRAM-Idempotency"] = f"gptgram-{uuid.uuid4().hex[:12]}"
+        headers["X-GPTGRAM-Idempotency"] = f"gptgram-{secrets.token_hex(6)}"
+    
+    cache_key = (url, body) if "/api/mock/n8n/" in url else None
+    if cache_key is not None:
+        cached = _webhook_cache.get(cache_key)
+        if cached is not None:
+            _webhook_cache.move_to_end(cache_key)
+            return cached
     
     try:
-        response = requests.post(url, json=data, headers=headers, timeout=30)
+        response = await HTTP.post(url, content=body, headers=headers)
         response.raise_for_status()
         
         # Try to parse JSON
         try:
             result = response.json()
             print(f"Webhook response: {json.dumps(result)[:200]}")
+            if cache_key is not None and WEBHOOK_CACHE_SIZE > 0:
+                _webhook_cache[cache_key] = result
+                if len(_webhook_cache) > WEBHOOK_CACHE_SIZE:
+                    _webhook_cache.popitem(last=False)
             return result
         except json.JSONDecodeError:
             # If response is empty, return mock data
@@ -196,9 +304,9 @@ async def call_n8n_webhook(url: str, data: dict, hmac_secret: str = None) -> dic
                     return {"summary": "[Summary]"}
             print(f"Warning: n8n returned non-JSON: {response.text[:200]}")
             return {"result": response.text or "[empty]", "raw_response": True}
-    except requests.exceptions.RequestException as e:
+    except httpx.HTTPError as e:
         error_msg = str(e)
-        if hasattr(e, 'response') and e.response is not None:
+        if isinstance(e, httpx.HTTPStatusError):
             error_msg += f" | Status: {e.response.status_code}"
         print(f"Webhook error: {error_msg}")
         # Return mock data on error for testing
@@ -213,12 +321,20 @@ async def call_n8n_webhook(url: str, data: dict, hmac_secret: str = None) -> dic
 @app.post("/api/agents")
 async def create_agent(agent: Agent):
     """Create a new agent and optionally test the webhook"""
-    agent_id = str(uuid.uuid4())
+    agent_id = secrets.token_hex(16)
     agent_data = agent.dict()
     agent_data["id"] = agent_id
     agent_data["status"] = "active"
     agent_data["created_at"] = datetime.utcnow().isoformat()
     
+    # Small-domain labels share one interned string across all agents
+    for field in ("type", "status", "verification_level"):
+        agent_data[field] = sys.intern(agent_data[field])
+    
+    # Encode the webhook secret once, not on every call
+    if agent_data.get("hmac_secret"):
+        hmac_keys[agent_id] = agent_data["hmac_secret"].encode('utf-8')
+    
     # For n8n agents, test the webhook
     if agent_data["type"] == "n8n" and agent_data.get("endpoint_url"):
         try:
@@ -227,7 +343,7 @@ async def create_agent(agent: Agent):
             await call_n8n_webhook(
                 agent_data["endpoint_url"],
                 test_payload,
-                agent_data.get("hmac_secret")
+                hmac_keys.get(agent_id)
             )
             agent_data["webhook_status"] = "tested_ok"
         except Exception as e:
@@ -236,6 +352,8 @@ async def create_agent(agent: Agent):
             agent_data["test_error"] = str(e)
     
     agents[agent_id] = agent_data
+    _index_agent(agent_data)
+    _bump_version("agents")
     return agent_data
 
 @app.post("/api/agents/{agent_id}/execute")
@@ -250,7 +368,7 @@ async def execute_agent(agent_id: str, payload: dict = Body(...)):
         result = await call_n8n_webhook(
             agent["endpoint_url"],
             payload,
-            agent.get("hmac_secret")
+            hmac_keys.get(agent_id)
         )
         return {
             "agent_id": agent_id,
@@ -273,31 +391,29 @@ async def delete_agent(agent_id: str):
         raise HTTPException(404, "Agent not found")
     
     deleted = agents.pop(agent_id)
+    _unindex_agent(deleted)
+    _bump_version("agents")
+    hmac_keys.pop(agent_id, None)
     return {"message": "Agent deleted", "agent": deleted}
 
 @app.get("/api/chains")
 async def list_chains():
-    demo_chains = [
-        {
-            "id": "1",
-            "name": "Text Processing Pipeline",
-            "nodes": 3,
-            "estimated_cost_cents": 155
-        }
-    ]
-    return list(chains.values()) + demo_chains
+    if not chains:
+        return Response(content=_DEMO_CHAINS_BYTES, media_type="application/json")
+    return _cached_listing("chains", lambda: list(chains.values()) + _DEMO_CHAINS)
 
 @app.post("/api/chains")
 async def create_chain(chain: Chain):
-    chain_id = str(uuid.uuid4())
+    chain_id = secrets.token_hex(16)
     chain_data = chain.dict()
     chain_data["id"] = chain_id
     chains[chain_id] = chain_data
+    _bump_version("chains")
     return chain_data
 
 @app.post("/api/chains/{chain_id}/run")
 async def run_chain(chain_id: str):
-    run_id = str(uuid.uuid4())
+    run_id = secrets.token_hex(16)
     run = {
         "run_id": run_id,
         "chain_id": chain_id,
@@ -305,6 +421,7 @@ async def run_chain(chain_id: str):
         "started_at": datetime.utcnow().isoformat()
     }
     runs[run_id] = run
+    _bump_version("runs")
     
     # Simulate completion after a moment
     run["status"] = "succeeded"
@@ -318,22 +435,21 @@ async def run_chain(chain_id: str):
 
 @app.get("/api/chains/runs")
 async def list_runs():
-    demo_runs = [
-        {
-            "run_id": "1",
-            "chain_name": "Text Processing Pipeline",
-            "status": "succeeded",
-            "started_at": "2025-10-31T10:30:00",
-            "spent_cents": 155,
-            "nodes_executed": 3
-        }
-    ]
-    return list(runs.values()) + demo_runs
+    if not runs:
+        return Response(content=_DEMO_RUNS_BYTES, media_type="application/json")
+    return _cached_listing("runs", lambda: list(runs.values()) + _DEMO_RUNS)
 
 # Stripe endpoints
+def _get_stripe():
+    """Import and configure stripe on first use, keeping it off the startup path"""
+    import stripe
+    stripe.api_key = os.environ.get("STRIPE_SECRET_KEY", "")
+    return stripe
+
 @app.post("/api/wallet/create-checkout-session")
 async def create_checkout_session():
     try:
+        stripe = _get_stripe()
         session = stripe.checkout.Session.create(
             payment_method_types=['card'],
             line_items=[{
@@ -362,6 +478,7 @@ async def create_checkout_session():
 @app.get("/api/wallet/verify-checkout")
 async def verify_checkout(session_id: str):
     try:
+        stripe = _get_stripe()
         session = stripe.checkout.Session.retrieve(session_id)
         
         if session.payment_status == 'paid':
@@ -380,9 +497,21 @@ async def verify_checkout(session_id: str):
         raise HTTPException(400, str(e))
 
 # Mock n8n webhook endpoints for testing
+async def _read_json(request: Request) -> Dict:
+    """Parse a JSON object body directly, skipping Pydantic validation"""
+    body = await request.body()
+    try:
+        data = orjson.loads(body)
+    except ValueError:
+        raise HTTPException(422, "Request body must be valid JSON")
+    if not isinstance(data, dict):
+        raise HTTPException(422, "Request body must be a JSON object")
+    return data
+
 @app.post("/api/mock/n8n/sentiment")
-async def mock_sentiment(request: Request, data: Dict = Body(...)):
+async def mock_sentiment(request: Request):
     """Mock sentiment webhook with HMAC verification"""
+    data = await _read_json(request)
     # Check HMAC if provided
     signature_header = request.headers.get("X-GPTGRAM-Signature", "")
     if signature_header:
@@ -399,8 +528,9 @@ async def mock_sentiment(request: Request, data: Dict = Body(...)):
         return {"sentiment": "neutral", "score": 0}
 
 @app.post("/api/mock/n8n/translation")
-async def mock_translation(request: Request, data: Dict = Body(...)):
+async def mock_translation(request: Request):
     """Mock translation webhook"""
+    data = await _read_json(request)
     text = data.get("text", "")
     target = data.get("target", "es")
     
@@ -415,17 +545,20 @@ async def mock_translation(request: Request, data: Dict = Body(...)):
     else:
         return {"translated": f"[{target.upper()}] {text}", "target": target}
 
+_SENTENCE_END_RE = re.compile(r'\. ')
+
 @app.post("/api/mock/n8n/summarize")
-async def mock_summarize(request: Request, data: Dict = Body(...)):
+async def mock_summarize(request: Request):
     """Mock summarization webhook"""
+    data = await _read_json(request)
     text = data.get("text", "")
-    max_sentences = data.get("maxSentences", 2)
+    max_sentences = max(0, data.get("maxSentences", 2))
     style = data.get("style", "brief")
     
-    # Enhanced summary with metadata
-    sentences = text.split(". ")
-    if len(sentences) > max_sentences:
-        summary = ". ".join(sentences[:max_sentences]) + "."
+    # Enhanced summary with metadata: cut before the max_sentences-th ". ", if present
+    cuts = [m.start() for m in itertools.islice(_SENTENCE_END_RE.finditer(text), max_sentences)]
+    if max_sentences > 0 and len(cuts) == max_sentences:
+        summary = text[:cuts[-1]] + "."
     else:
         summary = text
     
@@ -443,15 +576,16 @@ async def mock_summarize(request: Request, data: Dict = Body(...)):
     }
 
 # Additional agent endpoints
+_WORD_RE = re.compile(r"[^\W\d_]{5,}")
+
 @app.post("/api/agents/keyword")
 async def extract_keywords(data: Dict = Body(...)):
     """Extract keywords from text"""
     text = data.get("text", "")
     max_keywords = data.get("max_keywords", 10)
     
-    # Mock keyword extraction
-    words = text.lower().split()
-    keywords = list(set([w for w in words if len(w) > 4]))[:max_keywords]
+    # Mock keyword extraction: words of 5+ letters, deduplicated in first-seen order
+    keywords = list(dict.fromkeys(_WORD_RE.findall(text.lower())))[:max_keywords]
     
     return {
         "keywords": keywords,
@@ -485,7 +619,11 @@ async def format_data(data: Dict = Body(...)):
     format_type = data.get("format", "json")
     
     if format_type == "json":
-        formatted = json.dumps(input_data, indent=2)
+        try:
+            formatted = orjson.dumps(input_data, option=orjson.OPT_INDENT_2).decode()
+        except TypeError:
+            # orjson rejects integers wider than 64 bits
+            formatted = json.dumps(input_data, indent=2)
     elif format_type == "xml":
         formatted = "<data>formatted_xml</data>"
     else:
@@ -555,20 +693,17 @@ async def calculate_pricing(data: Dict = Body(...)):
         "savings": total * 0.1
     }
 
+# Upper bounds of each risk level except the last (scores on a bound fall in the next level)
+_RISK_THRESHOLDS = [0.4, 0.7, 0.85]
+_RISK_LEVELS = ["low", "medium", "high", "critical"]
+
 @app.post("/api/agents/risk")
 async def assess_risk(data: Dict = Body(...)):
     """Assess risk level"""
     threshold = data.get("threshold", 0.7)
     
     score = random.uniform(0.3, 0.9)
-    if score < 0.4:
-        level = "low"
-    elif score < 0.7:
-        level = "medium"
-    elif score < 0.85:
-        level = "high"
-    else:
-        level = "critical"
+    level = _RISK_LEVELS[bisect.bisect_right(_RISK_THRESHOLDS, score)]
     
     return {
         "risk_level": level,
@@ -614,9 +749,27 @@ async def topup_wallet(amount_cents: int):
         "message": f"Added ${amount_cents/100:.2f} to wallet"
     }
 
+# Stripe top-ups are coalesced per user and applied once per flush tick
+TOPUP_FLUSH_SECONDS = 0.05
+_pending_topups = Counter()
+_topups_lock = asyncio.Lock()
+_topup_flusher = None
+
+async def _flush_topups():
+    """Apply accumulated top-up deltas to wallet balances every tick"""
+    global _pending_topups
+    while True:
+        await asyncio.sleep(TOPUP_FLUSH_SECONDS)
+        async with _topups_lock:
+            pending, _pending_topups = _pending_topups, Counter()
+        for username, amount in pending.items():
+            if username in users:
+                users[username]["wallet_balance"] += amount
+
 @app.post("/webhooks/stripe")
 async def stripe_webhook(request: dict):
     """Handle Stripe webhooks"""
+    global _topup_flusher
     # In production, verify webhook signature
     event_type = request.get("type")
     
@@ -625,25 +778,30 @@ async def stripe_webhook(request: dict):
         user_id = session.get("metadata", {}).get("user_id")
         
         if user_id and "demo" in users:
-            users["demo"]["wallet_balance"] += session.get("amount_total", 0)
+            async with _topups_lock:
+                _pending_topups["demo"] += session.get("amount_total", 0)
+            
+            if _topup_flusher is None or _topup_flusher.done():
+                _topup_flusher = asyncio.create_task(_flush_topups())
     
     return {"received": True}
 
 # Transformer endpoints for chain builder
+_TOKEN_RE = re.compile(r'@(\w+)\.([.\w\[\]]+)')
+
 @app.post("/api/chain/resolve-atokens")
 async def resolve_atokens(request: dict):
     """Resolve @Agent.field tokens in template"""
-    import re
     template = request.get("template", "")
     outputs_map = request.get("outputs_map", {})
     
     # Extract tokens
-    pattern = r'@(\w+)\.([.\w\[\]]+)'
-    tokens = re.findall(pattern, template)
+    replacements = {}
     unresolved = []
     
-    for agent, path in tokens:
-        token = f"@{agent}.{path}"
+    for match in _TOKEN_RE.finditer(template):
+        token = match.group(0)
+        agent, path = match.groups()
         if agent in outputs_map:
             value = outputs_map[agent]
             for part in path.split('.'):
@@ -653,10 +811,14 @@ async def resolve_atokens(request: dict):
                     unresolved.append(token)
                     break
             if value is not None:
-                template = template.replace(token, str(value))
+                replacements[token] = str(value)
         else:
             unresolved.append(token)
     
+    # Substitute every resolved token in a single pass
+    if replacements:
+        template = _TOKEN_RE.sub(lambda m: replacements.get(m.group(0), m.group(0)), template)
+    
     return {
         "resolved_payload": {"text": template},
         "unresolved_tokens": unresolved
@@ -710,6 +872,32 @@ async def try_deterministic_mappings(request: dict):
 @app.get("/api/chain/recommend-agents")
 async def recommend_agents(context_node_ids: list = [], top_k: int = 5):
     """Recommend compatible agents"""
+    # Distinct fields produced upstream, so a field output by two context agents counts once
+    upstream_fields = set()
+    for context_id in context_node_ids:
+        context_agent = agents.get(context_id)
+        if context_agent:
+            upstream_fields.update(_schema_fields(context_agent.get("output_schema")))
+    
+    # Agents whose input fields match those fields, via the field index
+    shared_fields = Counter()
+    for field in upstream_fields:
+        for agent_id in _agents_by_input_field.get(field, ()):
+            if agent_id not in context_node_ids:
+                shared_fields[agent_id] += 1
+    
+    if shared_fields:
+        recommendations = []
+        for agent_id, shared in shared_fields.most_common(top_k):
+            input_fields = _schema_fields(agents[agent_id].get("input_schema"))
+            recommendations.append({
+                "agent_id": agent_id,
+                "name": agents[agent_id]["name"],
+                "compatibility_score": round(min(1.0, shared / max(1, len(input_fields))), 2),
+                "reasons": [f"Accepts {shared} field(s) produced upstream"]
+            })
+        return recommendations
+    
     recommendations = [
         {
             "agent_id": "sentiment",
@@ -733,9 +921,10 @@ async def execute_chain(request: dict):
     execution_log = []
     outputs = {}
     total_cost = 0
+    nodes_by_id = {n["id"]: n for n in request.get("nodes", [])}
     
     for node_id in request.get("execution_order", []):
-        node = next((n for n in request["nodes"] if n["id"] == node_id), None)
+        node = nodes_by_id.get(node_id)
         if not node:
             continue
         
@@ -759,7 +948,7 @@ async def execute_chain(request: dict):
             total_cost += 50
     
     return {
-        "execution_id": f"exec-{int(time.time())}",
+        "execution_id": f"exec-{next(_execution_id_seq)}",
         "status": "success",
         "outputs": outputs,
         "total_cost": total_cost,
@@ -769,8 +958,9 @@ async def execute_chain(request: dict):
 @app.post("/api/chain/save")
 async def save_chain(request: dict):
     """Save chain configuration"""
-    chain_id = f"chain-{int(time.time())}"
+    chain_id = f"chain-{next(_chain_id_seq)}"
     chains[chain_id] = request
+    _bump_version("chains")
     return {"chain_id": chain_id, "status": "saved"}
 
 @app.post("/api/wallet/deduct")
@@ -787,6 +977,35 @@ async def save_analytics(request: dict):
     # Update mock analytics data
     return {"status": "saved"}
 
+# Static analytics series, built once at import
+_ANALYTICS_AGENTS_BY_TYPE = {
+    "n8n": 3,
+    "custom": 2,
+    "prompt": 1
+}
+
+_ANALYTICS_TRANSFORM_METHODS = {
+    "deterministic": 45,
+    "gat": 30,
+    "llm": 25
+}
+
+_ANALYTICS_REVENUE_OVER_TIME = [
+    {"date": "2025-10-25", "revenue": 2500},
+    {"date": "2025-10-26", "revenue": 3200},
+    {"date": "2025-10-27", "revenue": 2800},
+    {"date": "2025-10-28", "revenue": 3500},
+    {"date": "2025-10-29", "revenue": 4200},
+    {"date": "2025-10-30", "revenue": 3800},
+    {"date": "2025-10-31", "revenue": 4500}
+]
+
+_ANALYTICS_AGENT_PERFORMANCE = [
+    {"name": "Summarizer", "runs": 150, "success_rate": 98},
+    {"name": "Sentiment", "runs": 120, "success_rate": 95},
+    {"name": "Translator", "runs": 100, "success_rate": 92}
+]
+
 @app.get("/api/analytics/data")
 async def get_analytics():
     """Get analytics data"""
@@ -798,31 +1017,11 @@ async def get_analytics():
         "agents": len(agents_db),
         "chains": len(runs_db),
         "runs": runs_db[:5],  # Last 5 runs
-        "agents_by_type": {
-            "n8n": 3,
-            "custom": 2,
-            "prompt": 1
-        },
+        "agents_by_type": _ANALYTICS_AGENTS_BY_TYPE,
         "success_rate": 95.2,
-        "transform_methods": {
-            "deterministic": 45,
-            "gat": 30,
-            "llm": 25
-        },
-        "revenue_over_time": [
-            {"date": "2025-10-25", "revenue": 2500},
-            {"date": "2025-10-26", "revenue": 3200},
-            {"date": "2025-10-27", "revenue": 2800},
-            {"date": "2025-10-28", "revenue": 3500},
-            {"date": "2025-10-29", "revenue": 4200},
-            {"date": "2025-10-30", "revenue": 3800},
-            {"date": "2025-10-31", "revenue": 4500}
-        ],
-        "agent_performance": [
-            {"name": "Summarizer", "runs": 150, "success_rate": 98},
-            {"name": "Sentiment", "runs": 120, "success_rate": 95},
-            {"name": "Translator", "runs": 100, "success_rate": 92}
-        ]
+        "transform_methods": _ANALYTICS_TRANSFORM_METHODS,
+        "revenue_over_time": _ANALYTICS_REVENUE_OVER_TIME,
+        "agent_performance": _ANALYTICS_AGENT_PERFORMANCE
     }
 
 # Include transformer router if available
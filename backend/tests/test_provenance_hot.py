@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+Provenance origin tracing tests
+The indexed lookup must pick the same origin as a linear scan of node results
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.services.provenance_hot import build_origin_index, trace_field_origin
+
+def _trace(field_name, field_value, node_results):
+    exact_index, lower_name_index = build_origin_index(node_results)
+    return trace_field_origin(field_name, field_value, exact_index, lower_name_index)
+
+def test_exact_match_prefers_first_node():
+    node_results = {
+        'n1': {'text': 'hello'},
+        'n2': {'text': 'hello'}
+    }
+    
+    assert _trace('text', 'hello', node_results) == ('n1', None)
+
+def test_transformed_match_follows_node_order():
+    """An earlier node's alias match wins over a later node's same-name field"""
+    
+    node_results = {
+        'n1': {'title': 'Hello World'},
+        'n2': {'name': 'Hello World!'}
+    }
+    
+    assert _trace('name', 'Hello World', node_results) == ('n1', 'title')
+
+def test_transformed_match_follows_field_order_within_node():
+    node_results = {
+        'n1': {'summary': 'Some text', 'description': 'some text'}
+    }
+    
+    assert _trace('description', 'SOME TEXT', node_results) == ('n1', 'summary')
+
+def test_unhashable_values_match_exactly():
+    node_results = {
+        'n1': {'tags': ['a', 'b']},
+        'n2': {'tags': ['a', 'b']}
+    }
+    
+    assert _trace('tags', ['a', 'b'], node_results) == ('n1', None)
+
+def test_no_similar_field_has_no_origin():
+    node_results = {'n1': {'count': 3}}
+    
+    assert _trace('text', 'hello', node_results) == (None, None)
@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""
+WalletService idempotency tests
+Runs against the PostgreSQL database in DATABASE_URL and is skipped when it
+is not reachable
+"""
+
+import uuid
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("asyncpg")
+import pytest_asyncio
+from sqlalchemy import select, delete, func
+
+from app.database import async_engine, AsyncSessionLocal
+from app.models import Wallet, Transaction, User, Chain, ChainRun
+from app.models.base import Base
+from app.models.wallet import TransactionType
+from app.services.wallet_service import WalletService
+
+@pytest_asyncio.fixture
+async def db():
+    """Session on the test database, skipping the test when it is unreachable"""
+    
+    try:
+        async with async_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    except Exception as e:
+        pytest.skip(f"PostgreSQL not available: {e}")
+    
+    async with AsyncSessionLocal() as session:
+        yield session
+
+@pytest_asyncio.fixture
+async def user(db):
+    """User with an empty wallet, removed with everything it owns afterwards"""
+    
+    suffix = uuid.uuid4().hex[:12]
+    user = User(
+        email=f"wallet_{suffix}@test.local",
+        username=f"wallet_{suffix}",
+        password_hash="x"
+    )
+    db.add(user)
+    await db.flush()
+    db.add(Wallet(user_id=user.id, balance_cents=0, reserved_cents=0, currency="USD"))
+    await db.commit()
+    
+    yield user
+    
+    await db.rollback()
+    wallet_ids = select(Wallet.id).where(Wallet.user_id == user.id).scalar_subquery()
+    await db.execute(delete(Transaction).where(Transaction.wallet_id.in_(wallet_ids)))
+    await db.execute(delete(ChainRun).where(ChainRun.owner_user_id == user.id))
+    await db.execute(delete(Chain).where(Chain.owner_user_id == user.id))
+    await db.execute(delete(Wallet).where(Wallet.user_id == user.id))
+    await db.execute(delete(User).where(User.id == user.id))
+    await db.commit()
+
+async def _wallet_amounts(db, user_id):
+    """(balance_cents, reserved_cents) read straight from the database"""
+    
+    result = await db.execute(
+        select(Wallet.balance_cents, Wallet.reserved_cents).where(Wallet.user_id == user_id)
+    )
+    return tuple(result.one())
+
+async def _count_transactions(db, tx_type, external_ids):
+    """Number of transactions of a type recorded under the given external ids"""
+    
+    result = await db.execute(
+        select(func.count(Transaction.id)).where(
+            Transaction.type == tx_type,
+            Transaction.external_id.in_(external_ids)
+        )
+    )
+    return result.scalar_one()
+
+@pytest.mark.asyncio
+async def test_repeat_calls_are_idempotent(db, user):
+    """Replaying a topup or hold with the same external id changes nothing"""
+    
+    wallet = WalletService(db)
+    topup_id = f"evt_{uuid.uuid4().hex}"
+    hold_id = f"hold_{uuid.uuid4().hex}"
+    
+    for _ in range(2):
+        assert await wallet.topup_wallet(str(user.id), 1000, topup_id) == topup_id
+    for _ in range(2):
+        assert await wallet.create_hold(str(user.id), 300, hold_id) == hold_id
+    
+    assert await _wallet_amounts(db, user.id) == (1000, 300)
+    assert await _count_transactions(db, TransactionType.TOPUP, [topup_id]) == 1
+    assert await _count_transactions(db, TransactionType.HOLD, [hold_id]) == 1
+
+@pytest.mark.asyncio
+async def test_insufficient_funds_rolls_back_hold(db, user):
+    """A hold the wallet cannot cover leaves no HOLD row and reserves nothing"""
+    
+    wallet = WalletService(db)
+    hold_id = f"hold_{uuid.uuid4().hex}"
+    
+    await wallet.topup_wallet(str(user.id), 100, f"evt_{uuid.uuid4().hex}")
+    
+    with pytest.raises(ValueError):
+        await wallet.create_hold(str(user.id), 500, hold_id)
+    await db.commit()
+    
+    async with AsyncSessionLocal() as fresh:
+        assert await _wallet_amounts(fresh, user.id) == (100, 0)
+        assert await _count_transactions(fresh, TransactionType.HOLD, [hold_id]) == 0
+    
+    # The external id was not consumed, so the hold goes through once funded
+    await wallet.topup_wallet(str(user.id), 400, f"evt_{uuid.uuid4().hex}")
+    assert await wallet.create_hold(str(user.id), 500, hold_id) == hold_id
+    assert await _wallet_amounts(db, user.id) == (500, 500)
+
+@pytest.mark.asyncio
+async def test_settle_many_skips_already_settled_nodes(db, user):
+    """settle_many releases reserved funds only for nodes not settled before"""
+    
+    wallet = WalletService(db)
+    
+    chain = Chain(owner_user_id=user.id, name="wallet test", descriptor={"nodes": [], "edges": []})
+    db.add(chain)
+    await db.flush()
+    run = ChainRun(chain_id=chain.id, owner_user_id=user.id, reserved_cents=300)
+    db.add(run)
+    await db.commit()
+    run_id = str(run.id)
+    
+    await wallet.topup_wallet(str(user.id), 1000, f"evt_{uuid.uuid4().hex}")
+    await wallet.create_hold(str(user.id), 300, f"hold_{run_id}")
+    
+    await wallet.settle_node_payment(run_id, "a", 100)
+    settled = await wallet.settle_many(run_id, [("a", 100), ("b", 50)])
+    
+    assert settled == [f"settle_{run_id}_a", f"settle_{run_id}_b"]
+    assert await _wallet_amounts(db, user.id) == (1000, 150)
+    assert await _count_transactions(db, TransactionType.SETTLE, settled) == 2